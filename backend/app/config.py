@@ -26,12 +26,17 @@ if BaseSettings is not None:
     class Settings(BaseSettings):
         mongodb_uri: str
         mongodb_db_name: str
+        mongodb_max_pool_size: int = 50  # Per-process motor connection pool
+        mongodb_min_pool_size: int = 5   # Kept open so bursts skip the TLS handshake
         openai_api_key: str  # Changed from gemini_api_key
         voyage_api_key: str
         backboard_api_key: str = ""  # Backboard.io unified API (optional)
         environment: str = "development"
         log_level: str = "INFO"
         
+        # On-disk embedding cache for ingestion; relative paths are under backend/ ("" disables it)
+        embedding_disk_cache_path: str = ".cache/embeddings.sqlite3"
+        
         # Neo4j settings
         neo4j_uri: str = "bolt://localhost:7687"
         neo4j_user: str = "neo4j"
@@ -51,12 +56,17 @@ else:
         def __init__(self) -> None:
             self.mongodb_uri = os.getenv("MONGODB_URI", "")
             self.mongodb_db_name = os.getenv("MONGODB_DB_NAME", "tutor_agent")
+            self.mongodb_max_pool_size = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+            self.mongodb_min_pool_size = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
             self.openai_api_key = os.getenv("OPENAI_API_KEY", "")  # Changed from GEMINI_API_KEY
             self.voyage_api_key = os.getenv("VOYAGE_API_KEY", "")
             self.backboard_api_key = os.getenv("BACKBOARD_API_KEY", "")  # Backboard.io unified API
             self.environment = os.getenv("ENVIRONMENT", "development")
             self.log_level = os.getenv("LOG_LEVEL", "INFO")
             
+            # On-disk embedding cache for ingestion; relative paths are under backend/ ("" disables it)
+            self.embedding_disk_cache_path = os.getenv("EMBEDDING_DISK_CACHE_PATH", ".cache/embeddings.sqlite3")
+            
             # Neo4j settings
             self.neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
             self.neo4j_user = os.getenv("NEO4J_USER", "neo4j")
@@ -32,7 +32,9 @@ async def connect_to_mongo() -> None:
     # Use certifi for SSL certificate verification on macOS
     mongodb.client = _AsyncIOMotorClient(
         settings.mongodb_uri,
-        tlsCAFile=certifi.where()
+        tlsCAFile=certifi.where(),
+        maxPoolSize=settings.mongodb_max_pool_size,
+        minPoolSize=settings.mongodb_min_pool_size,
     )
     mongodb.db = mongodb.client[settings.mongodb_db_name]
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.database import close_mongo_connection, connect_to_mongo, get_db
@@ -11,48 +12,58 @@ from app.routes import session
 from app.routes.companies import router as companies_router
 from app.routes.commerce import router as commerce_router
 from app.routes import cache as cache_routes
+from app.utils.cors import AllowAllCORSMiddleware
+from app.utils.log_queue import configure_logging
 from app.utils.rate_limiter import get_rate_limit_status
 from app.services.backboard_ai import backboard_ai
 from app.services.graph import graph_service
 from app.services.cache_service import ensure_cache_indexes
+from app.services.semantic_filter import (
+    clear_embedding_cache,
+    ensure_embedding_cache_indexes,
+    warm_embedding_cache,
+)
+
+
+async def _prepare_caches() -> None:
+    """Cache indexes and embedding warm-up; runs in the background at startup."""
+    try:
+        db = get_db()
+        await ensure_cache_indexes(db)
+        await ensure_embedding_cache_indexes(db)
+        await warm_embedding_cache(db)
+    except Exception as e:
+        logging.warning(f"Failed to initialize cache indexes (non-fatal): {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_to_mongo()
+    # Initialize Neo4j schema
+    try:
+        if graph_service.verify_connectivity():
+            graph_service.ensure_schema()
+    except Exception as e:
+        logging.warning(f"Neo4j setup skipped: {e}")
+    # Initialize cache indexes without holding up the first request
+    cache_setup = asyncio.create_task(_prepare_caches())
+
+    try:
+        yield
+    finally:
+        cache_setup.cancel()
+        with suppress(asyncio.CancelledError):
+            await cache_setup
+        await close_mongo_connection()
+        graph_service.close()
 
 
 def create_app(with_db: bool = True) -> FastAPI:
-    logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO))
+    configure_logging(getattr(logging, settings.log_level.upper(), logging.INFO))
 
-    app = FastAPI(title="Universal On-Screen Tutor API")
+    app = FastAPI(title="Universal On-Screen Tutor API", lifespan=lifespan if with_db else None)
 
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-    if with_db:
-
-        @app.on_event("startup")
-        async def startup_event():
-            await connect_to_mongo()
-            # Initialize Neo4j schema
-            try:
-                if graph_service.verify_connectivity():
-                    graph_service.setup_schema()
-                    graph_service.setup_vector_index()
-            except Exception as e:
-                logging.warning(f"Neo4j setup skipped: {e}")
-            # Initialize cache indexes
-            try:
-                db = get_db()
-                await ensure_cache_indexes(db)
-            except Exception as e:
-                logging.warning(f"Failed to initialize cache indexes (non-fatal): {e}")
-
-        @app.on_event("shutdown")
-        async def shutdown_event():
-            await close_mongo_connection()
-            graph_service.close()
+    app.add_middleware(AllowAllCORSMiddleware)
 
     app.include_router(session.router, prefix="/api/session", tags=["session"])
     app.include_router(companies_router, prefix="/api/companies", tags=["companies"])
@@ -76,8 +87,7 @@ def create_app(with_db: bool = True) -> FastAPI:
     @app.post("/api/cache/clear-embeddings")
     async def clear_embedding_cache_endpoint():
         """Clear embedding cache (use after changing Voyage API key)"""
-        from app.services.semantic_filter import clear_embedding_cache
-        clear_embedding_cache()
+        await clear_embedding_cache()
         return {"status": "success", "message": "Embedding cache cleared"}
 
     @app.post("/api/backboard/learn")
@@ -90,3 +100,18 @@ def create_app(with_db: bool = True) -> FastAPI:
 
 
 app = create_app(with_db=True)
+
+
+if __name__ == "__main__":
+    # `python -m app.main`: pin uvloop + httptools rather than leaving it to
+    # uvicorn's "auto" detection (both ship with uvicorn[standard])
+    import importlib.util
+
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        port=8000,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+    )
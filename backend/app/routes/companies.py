@@ -304,8 +304,7 @@ async def setup_schema():
     Should be called once when setting up the system.
     """
     try:
-        graph_service.setup_schema()
-        graph_service.setup_vector_index()
+        graph_service.ensure_schema(force=True)
         return {"status": "Schema setup complete"}
     except Exception as e:
         logger.exception(f"Error setting up schema: {e}")
@@ -16,6 +16,9 @@ logger = logging.getLogger(__name__)
 # Backboard.io API configuration
 BACKBOARD_BASE_URL = "https://app.backboard.io/api"
 
+# Keys the planner adds to feature dicts for the semantic filter only
+_FILTER_ONLY_KEYS = frozenset({"_search_text", "_text_lower"})
+
 
 class AIModel(Enum):
     """Available AI models for different tasks (optimized for speed)"""
@@ -185,7 +188,7 @@ class BackboardAI:
             
             # Extract message content from response
             content = data.get("content", "")
-            logger.info(f"Backboard response content (first 200 chars): {content[:200]}")
+            logger.debug("Backboard response content (first 200 chars): %.200s", content)
             return content
             
         except Exception as e:
@@ -358,7 +361,11 @@ Return JSON with insights."""
         """Build enhanced prompt with user context"""
         import json
         
-        features_json = json.dumps(features[:30], ensure_ascii=False)
+        # Leave out the semantic filter's derived search fields
+        features_json = json.dumps(
+            [{k: v for k, v in f.items() if k not in _FILTER_ONLY_KEYS} for f in features[:30]],
+            ensure_ascii=False,
+        )
         
         return f"""You are a web automation planner with adaptive memory.
 
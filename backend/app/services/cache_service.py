@@ -14,6 +14,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
+from pymongo import IndexModel
+
 from app.models.cache import CachedPlan, CacheMatchResult, CacheStats
 from app.services.embeddings import EmbeddingsError, embed_text
 
@@ -126,55 +128,37 @@ async def ensure_cache_indexes(db) -> None:
     - Index on canonical_goal for exact match
     - Compound index on target_domain + avg_completion_rate + total_uses for quality sorting
     """
-    try:
-        collection = db.plan_cache
-        
+    models = [
         # TTL index for auto-expiration
-        await collection.create_index(
-            "expires_at",
-            expireAfterSeconds=0,
-            name="ttl_expires_at"
-        )
-        
+        IndexModel("expires_at", expireAfterSeconds=0, name="ttl_expires_at"),
         # Text index for full-text search
-        await collection.create_index(
+        IndexModel(
             [
                 ("canonical_goal", "text"),
                 ("original_user_goal", "text"),
                 ("goal_keywords", "text"),
             ],
-            name="text_search_idx"
-        )
-        
+            name="text_search_idx",
+        ),
         # Exact match on canonical_goal
-        await collection.create_index(
-            "canonical_goal",
-            name="canonical_goal_idx"
-        )
-        
+        IndexModel("canonical_goal", name="canonical_goal_idx"),
         # Exact match on original_user_goal (raw prompt)
-        await collection.create_index(
-            "original_user_goal",
-            name="original_user_goal_idx"
-        )
-        
+        IndexModel("original_user_goal", name="original_user_goal_idx"),
         # Compound index for domain + quality sorting
-        await collection.create_index(
+        IndexModel(
             [
                 ("target_domain", 1),
                 ("avg_completion_rate", -1),
                 ("total_uses", -1),
             ],
-            name="domain_quality_idx"
-        )
-        
+            name="domain_quality_idx",
+        ),
         # Index on cache_id for lookups
-        await collection.create_index(
-            "cache_id",
-            unique=True,
-            name="cache_id_idx"
-        )
-        
+        IndexModel("cache_id", unique=True, name="cache_id_idx"),
+    ]
+    try:
+        # One createIndexes command for all of them instead of a round-trip each
+        await db.plan_cache.create_indexes(models)
         logger.info("Cache indexes created successfully")
     except Exception as e:
         logger.warning(f"Failed to create cache indexes (non-fatal): {e}")
@@ -6,17 +6,21 @@ Handles crawling, chunking, embedding, and procedure extraction from documentati
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import sqlite3
+import sys
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 from io import BytesIO
 
-import requests
+import httpx
 from bs4 import BeautifulSoup
 
-from app.config import settings
+from app.services.embedding_cache import get_disk_cache
+from app.services.embeddings import get_voyage_client
 from app.services.graph import graph_service
 
 logger = logging.getLogger(__name__)
@@ -25,118 +29,154 @@ logger = logging.getLogger(__name__)
 # Crawling
 # ============================================================================
 
-def crawl_docs(
+_MAIN_CONTENT_CLASS = re.compile(r"content|docs|documentation")
+
+
+# Pages fetched at once; one client, so this also caps open connections
+CRAWL_CONCURRENCY = 16
+_SKIP_PATHS = ("/blog", "/news", "/careers", "/about", "/contact", "/pricing")
+
+
+def _crawl_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=10,
+        follow_redirects=True,
+        headers={"User-Agent": "DocIngestion/1.0 (Knowledge Base Builder)"},
+        limits=httpx.Limits(max_connections=CRAWL_CONCURRENCY),
+    )
+
+
+def _parse_page(url: str, html: str, domain: str, same_domain_only: bool) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Extract {url, title, text, headings} and the links worth following; (None, []) if too short."""
+    soup = BeautifulSoup(html, "html.parser")
+    
+    # Remove unwanted elements
+    for tag in soup.find_all(["nav", "header", "footer", "aside", "script", "style"]):
+        tag.decompose()
+    
+    # Extract title
+    title = ""
+    if soup.title:
+        title = soup.title.get_text(strip=True)
+    elif soup.find("h1"):
+        title = soup.find("h1").get_text(strip=True)
+    
+    # Extract headings
+    headings = []
+    for h in soup.find_all(["h1", "h2", "h3", "h4"]):
+        text = h.get_text(strip=True)
+        if text and len(text) < 200:
+            headings.append(text)
+    
+    # Extract main content
+    main = soup.find("main") or soup.find("article") or soup.find(class_=_MAIN_CONTENT_CLASS)
+    if main:
+        text = main.get_text(separator="\n", strip=True)
+    else:
+        text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
+    
+    # Skip if too little content (its links aren't followed either)
+    if len(text) < 100:
+        return None, []
+    
+    # Find links to follow
+    links = []
+    for link in soup.find_all("a", href=True):
+        absolute_url = urljoin(url, link["href"])
+        parsed = urlparse(absolute_url)
+        
+        # Filter by domain if required
+        if same_domain_only and parsed.netloc != domain:
+            continue
+        
+        # Skip non-doc paths
+        if any(p in parsed.path.lower() for p in _SKIP_PATHS):
+            continue
+        
+        links.append(absolute_url)
+    
+    return {"url": url, "title": title, "text": text, "headings": headings}, links
+
+
+async def iter_crawled_docs(
     root_url: str,
     max_pages: int = 50,
     same_domain_only: bool = True
-) -> List[Dict[str, Any]]:
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    Crawl documentation starting from a root URL.
+    Breadth-first crawl from a root URL, yielding {url, title, text, headings} per page.
     
-    Returns list of {url, title, text, headings}
+    Fetches the frontier in waves sized to the pages still needed, with at most
+    CRAWL_CONCURRENCY requests in flight over one client. Pages come out in BFS order.
     """
-    parsed_root = urlparse(root_url)
-    domain = parsed_root.netloc
+    domain = urlparse(root_url).netloc
     
     visited = set()
     to_visit = [root_url]
-    pages = []
+    crawled = 0
+    limit = asyncio.Semaphore(CRAWL_CONCURRENCY)
     
     logger.info(f"Starting crawl from {root_url} (max {max_pages} pages)")
     
-    while to_visit and len(pages) < max_pages:
-        url = to_visit.pop(0)
-        
-        # Normalize URL
-        url = url.split("#")[0]  # Remove fragment
-        if url in visited:
-            continue
-        
-        visited.add(url)
-        
+    async def fetch(client: httpx.AsyncClient, url: str):
         try:
-            response = requests.get(url, timeout=10, headers={
-                "User-Agent": "DocIngestion/1.0 (Knowledge Base Builder)"
-            })
+            async with limit:
+                response = await client.get(url)
             
             if response.status_code != 200:
                 logger.debug(f"Skipping {url} (status {response.status_code})")
-                continue
+                return None, []
             
             if "text/html" not in response.headers.get("Content-Type", ""):
-                continue
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Remove unwanted elements
-            for tag in soup.find_all(["nav", "header", "footer", "aside", "script", "style"]):
-                tag.decompose()
-            
-            # Extract title
-            title = ""
-            if soup.title:
-                title = soup.title.get_text(strip=True)
-            elif soup.find("h1"):
-                title = soup.find("h1").get_text(strip=True)
-            
-            # Extract headings
-            headings = []
-            for h in soup.find_all(["h1", "h2", "h3", "h4"]):
-                text = h.get_text(strip=True)
-                if text and len(text) < 200:
-                    headings.append(text)
-            
-            # Extract main content
-            main = soup.find("main") or soup.find("article") or soup.find(class_=re.compile(r"content|docs|documentation"))
-            if main:
-                text = main.get_text(separator="\n", strip=True)
-            else:
-                text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
-            
-            # Skip if too little content
-            if len(text) < 100:
-                continue
-            
-            pages.append({
-                "url": url,
-                "title": title,
-                "text": text,
-                "headings": headings
-            })
-            
-            logger.info(f"Crawled [{len(pages)}/{max_pages}]: {title[:50]}...")
+                return None, []
             
-            # Find links to follow
-            for link in soup.find_all("a", href=True):
-                href = link["href"]
-                absolute_url = urljoin(url, href)
-                parsed = urlparse(absolute_url)
-                
-                # Filter by domain if required
-                if same_domain_only and parsed.netloc != domain:
-                    continue
-                
-                # Skip non-doc paths
-                skip_patterns = ["/blog", "/news", "/careers", "/about", "/contact", "/pricing"]
-                if any(p in parsed.path.lower() for p in skip_patterns):
-                    continue
-                
-                # Prefer doc paths
-                if absolute_url not in visited:
-                    to_visit.append(absolute_url)
-        
+            # BeautifulSoup is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(_parse_page, url, response.text, domain, same_domain_only)
         except Exception as e:
             logger.warning(f"Error crawling {url}: {e}")
-            continue
+            return None, []
+    
+    async with _crawl_client() as client:
+        while to_visit and crawled < max_pages:
+            wave: List[str] = []
+            while to_visit and len(wave) < max_pages - crawled:
+                url = to_visit.pop(0).split("#")[0]  # Remove fragment
+                if url not in visited:
+                    visited.add(url)
+                    wave.append(url)
+            
+            results = await asyncio.gather(*(fetch(client, url) for url in wave))
+            for page, links in results:
+                to_visit.extend(link for link in links if link not in visited)
+                if page is not None and crawled < max_pages:
+                    crawled += 1
+                    logger.info(f"Crawled [{crawled}/{max_pages}]: {page['title'][:50]}...")
+                    yield page
     
-    logger.info(f"Crawl complete: {len(pages)} pages")
-    return pages
+    logger.info(f"Crawl complete: {crawled} pages")
+
+
+async def crawl_docs(
+    root_url: str,
+    max_pages: int = 50,
+    same_domain_only: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Crawl documentation starting from a root URL.
+    
+    Returns list of {url, title, text, headings}
+    """
+    return [page async for page in iter_crawled_docs(root_url, max_pages, same_domain_only)]
 
 
 # ============================================================================
 # Chunking
 # ============================================================================
 
+_SECTION_BREAK = re.compile(r"\n(?=#{1,4}\s|[A-Z][^.!?\n]{5,50}\n[-=]+\n|\d+\.\s[A-Z])")
+_MARKDOWN_HEADING = re.compile(r"^#{1,4}\s")
+
+
 def chunk_page(
     text: str,
     headings_aware: bool = True,
@@ -157,8 +197,7 @@ def chunk_page(
     
     if headings_aware:
         # Split by heading patterns
-        heading_pattern = r"\n(?=#{1,4}\s|[A-Z][^.!?\n]{5,50}\n[-=]+\n|\d+\.\s[A-Z])"
-        sections = re.split(heading_pattern, text)
+        sections = _SECTION_BREAK.split(text)
         
         current_heading = None
         for section in sections:
@@ -169,7 +208,7 @@ def chunk_page(
             # Check if section starts with a heading
             lines = section.split("\n", 1)
             first_line = lines[0].strip()
-            if re.match(r"^#{1,4}\s", first_line) or (len(first_line) < 80 and first_line.isupper()):
+            if _MARKDOWN_HEADING.match(first_line) or (len(first_line) < 80 and first_line.isupper()):
                 current_heading = first_line.lstrip("#").strip()
             
             # Split long sections
@@ -230,31 +269,54 @@ def _split_text(text: str, max_chars: int, overlap_chars: int) -> List[str]:
 # Embedding
 # ============================================================================
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+EMBED_MODEL = "voyage-2"
+# Texts per Voyage request (well under the API's 128-text / 120k-token limits
+# for ~400-token chunks)
+EMBED_BATCH_SIZE = 32
+
+
+def embed_texts(texts: List[str], use_disk_cache: bool = False) -> List[List[float]]:
     """
     Generate embeddings for a list of texts using Voyage AI.
     
+    Texts repeated in `texts` are sent once. With use_disk_cache (ingestion only -
+    request-path text like user goals must not pile up on disk), texts already in
+    the on-disk cache aren't sent at all.
     Returns list of embedding vectors.
     """
     if not texts:
         return []
     
+    cache = get_disk_cache() if use_disk_cache else None
+    vectors: Dict[str, List[float]] = {}
+    if cache is not None:
+        try:
+            vectors = cache.get_many(EMBED_MODEL, texts)
+        except (sqlite3.Error, ValueError) as e:
+            # Optional cache: a locked or damaged file means embedding everything
+            logger.warning(f"Embedding disk cache read failed: {e}")
+    missing = list(dict.fromkeys(t for t in texts if t not in vectors))
+    
+    fresh: Dict[str, List[float]] = {}
     try:
-        import voyageai
-        vo = voyageai.Client(api_key=settings.voyage_api_key)
+        vo = get_voyage_client()  # Shared client: created once, connections reused
         
-        # Batch in groups of 8 to avoid rate limits
-        embeddings = []
-        for i in range(0, len(texts), 8):
-            batch = texts[i:i+8]
-            result = vo.embed(batch, model="voyage-2")
-            embeddings.extend(result.embeddings)
-        
-        return embeddings
+        for i in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[i:i + EMBED_BATCH_SIZE]
+            result = vo.embed(batch, model=EMBED_MODEL)
+            fresh.update(zip(batch, result.embeddings))
     except Exception as e:
         logger.error(f"Embedding failed: {e}")
-        # Return zero vectors as fallback
-        return [[0.0] * 1024 for _ in texts]
+    finally:
+        if cache is not None and fresh:
+            try:
+                cache.put_many(EMBED_MODEL, fresh)
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+    
+    vectors.update(fresh)
+    # Zero vectors as fallback for anything that failed
+    return [vectors.get(t) or [0.0] * 1024 for t in texts]
 
 
 def embed_text(text: str) -> List[float]:
@@ -267,6 +329,22 @@ def embed_text(text: str) -> List[float]:
 # Procedure Extraction
 # ============================================================================
 
+_NUMBERED_ITEM = re.compile(r"(?:^|\n)(\d+)\.\s+([^\n]+)")
+_STEP_ITEM = re.compile(r"(?:^|\n)(?:Step\s+)?(\d+)[:.]\s*([^\n]+)", re.IGNORECASE)
+_ACTION_BULLET = re.compile(
+    r"(?:^|\n)[\-\*•]\s*((?:Click|Select|Enter|Type|Navigate|Go to|Open|Choose|Press)[^\n]+)",
+    re.IGNORECASE,
+)
+
+# Selector / value hints inside a step instruction
+_QUOTED = re.compile(r'["\']([^"\']+)["\']')
+_CONTROL_REF = re.compile(
+    r'(?:the\s+)?["\']?(\w+(?:\s+\w+)?)["\']?\s+(?:button|link|tab|menu|option)', re.IGNORECASE
+)
+_URL = re.compile(r'(https?://[^\s]+)')
+_EXPECTED_STATE = re.compile(r'(?:should|will)\s+see\s+(.+)', re.IGNORECASE)
+
+
 def extract_procedures(page_text: str, page_title: str = "") -> List[Dict[str, Any]]:
     """
     Extract procedures (step-by-step instructions) from page text.
@@ -284,8 +362,7 @@ def extract_procedures(page_text: str, page_title: str = "") -> List[Dict[str, A
     procedures = []
     
     # Pattern 1: Numbered lists (1. 2. 3.)
-    numbered_pattern = r"(?:^|\n)(\d+)\.\s+([^\n]+)"
-    matches = list(re.finditer(numbered_pattern, page_text))
+    matches = list(_NUMBERED_ITEM.finditer(page_text))
     
     if len(matches) >= 3:
         # Group consecutive numbered items
@@ -310,8 +387,7 @@ def extract_procedures(page_text: str, page_title: str = "") -> List[Dict[str, A
             procedures.append(current_procedure)
     
     # Pattern 2: "Step X:" patterns
-    step_pattern = r"(?:^|\n)(?:Step\s+)?(\d+)[:.]\s*([^\n]+)"
-    step_matches = list(re.finditer(step_pattern, page_text, re.IGNORECASE))
+    step_matches = list(_STEP_ITEM.finditer(page_text))
     
     if step_matches and not procedures:
         current_procedure = {"steps": []}
@@ -325,8 +401,7 @@ def extract_procedures(page_text: str, page_title: str = "") -> List[Dict[str, A
             procedures.append(current_procedure)
     
     # Pattern 3: Bullet lists with action verbs
-    bullet_pattern = r"(?:^|\n)[\-\*•]\s*((?:Click|Select|Enter|Type|Navigate|Go to|Open|Choose|Press)[^\n]+)"
-    bullet_matches = list(re.finditer(bullet_pattern, page_text, re.IGNORECASE))
+    bullet_matches = list(_ACTION_BULLET.finditer(page_text))
     
     if len(bullet_matches) >= 3 and not procedures:
         current_procedure = {"steps": []}
@@ -360,34 +435,40 @@ def _parse_step(instruction: str, idx: int) -> Dict[str, Any]:
     if any(w in instruction_lower for w in ["click", "select", "press", "tap", "choose"]):
         action_type = "click"
         # Extract selector hint (quoted text or "X button/link")
-        quoted = re.search(r'["\']([^"\']+)["\']', instruction)
-        button_ref = re.search(r'(?:the\s+)?["\']?(\w+(?:\s+\w+)?)["\']?\s+(?:button|link|tab|menu|option)', instruction, re.I)
+        quoted = _QUOTED.search(instruction)
         if quoted:
             selector_hint = quoted.group(1)
-        elif button_ref:
-            selector_hint = button_ref.group(1)
+        else:
+            button_ref = _CONTROL_REF.search(instruction)
+            if button_ref:
+                selector_hint = button_ref.group(1)
     
     elif any(w in instruction_lower for w in ["type", "enter", "input", "fill", "write"]):
         action_type = "type"
         # Extract what to type
-        quoted = re.search(r'["\']([^"\']+)["\']', instruction)
+        quoted = _QUOTED.search(instruction)
         if quoted:
             selector_hint = quoted.group(1)
     
     elif any(w in instruction_lower for w in ["navigate", "go to", "open", "visit"]):
         action_type = "navigate"
         # Extract URL
-        url_match = re.search(r'(https?://[^\s]+)', instruction)
+        url_match = _URL.search(instruction)
         if url_match:
             selector_hint = url_match.group(1)
     
     elif any(w in instruction_lower for w in ["wait", "pause"]):
         action_type = "wait"
     
+    if selector_hint:
+        # Docs repeat the same control names across steps and pages ("Save", "New");
+        # canonical whitespace + interning keeps one copy per distinct hint
+        selector_hint = sys.intern(" ".join(selector_hint.split()))
+    
     # Infer expected state
     expected_state = None
     if "should see" in instruction_lower or "will see" in instruction_lower:
-        state_match = re.search(r'(?:should|will)\s+see\s+(.+)', instruction, re.I)
+        state_match = _EXPECTED_STATE.search(instruction)
         if state_match:
             expected_state = state_match.group(1).strip()
     
@@ -423,6 +504,134 @@ def _infer_goal(steps: List[Dict[str, Any]], page_title: str) -> str:
 # Full Ingestion Pipeline
 # ============================================================================
 
+# Max Neo4j writes in flight per ingestion (each holds a driver connection)
+GRAPH_WRITE_CONCURRENCY = 16
+# Items buffered between pipeline stages
+PIPELINE_QUEUE_SIZE = 64
+
+
+async def _graph_write(limit: asyncio.Semaphore, write: Callable[..., Any], **kwargs: Any) -> Any:
+    """Run one blocking graph_service write in a worker thread, `limit` at a time."""
+    async with limit:
+        return await asyncio.to_thread(write, **kwargs)
+
+
+async def _store_procedure(
+    limit: asyncio.Semaphore,
+    page_id: str,
+    proc_data: Dict[str, Any],
+    goal_embedding: List[float],
+) -> None:
+    # Create procedure
+    procedure = await _graph_write(
+        limit,
+        graph_service.create_procedure,
+        page_id=page_id,
+        goal=proc_data["goal"],
+        goal_embedding=goal_embedding,
+        source_text="\n".join([s["instruction"] for s in proc_data["steps"]])
+    )
+    
+    # All steps and their NEXT chain in one query
+    await _graph_write(
+        limit,
+        graph_service.create_steps_bulk,
+        procedure_id=procedure["id"],
+        steps=proc_data["steps"],
+    )
+
+
+def _page_items(page_id: str, text: str, title: str) -> List[Tuple[str, str, Dict[str, Any], str]]:
+    """A page's chunks then its procedures, as pipeline items (kind, page_id, payload, text to embed)."""
+    items = [("chunk", page_id, chunk, chunk["text"]) for chunk in chunk_page(text)]
+    items.extend(("procedure", page_id, proc, proc["goal"]) for proc in extract_procedures(text, title))
+    return items
+
+
+async def _run_pipeline(
+    pages: AsyncIterator[Tuple[str, str, str]],
+    limit: asyncio.Semaphore,
+) -> Tuple[int, int]:
+    """
+    chunk/extract -> embed -> Neo4j write, as three stages joined by bounded
+    queues: embedding starts with the first page instead of after the last,
+    and graph writes overlap the next embedding batch.
+    
+    `pages` yields (page_id, text, title) for page nodes that already exist.
+    Returns (chunks created, procedures created).
+    """
+    # Items are (kind, page_id, chunk or procedure, text to embed); None ends a stage
+    to_embed: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    to_write: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    counts = {"chunk": 0, "procedure": 0}
+    
+    async def produce() -> None:
+        async for page_id, text, title in pages:
+            # Chunking/extraction is pure CPU; keep it off the loop the crawl and writes share
+            for item in await asyncio.to_thread(_page_items, page_id, text, title):
+                await to_embed.put(item)
+        await to_embed.put(None)
+    
+    async def embed() -> None:
+        done = False
+        while not done:
+            item = await to_embed.get()
+            batch = []
+            # Take whatever is already queued, up to one Voyage batch
+            while item is not None:
+                batch.append(item)
+                if len(batch) == EMBED_BATCH_SIZE:
+                    break
+                try:
+                    item = to_embed.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            done = item is None
+            if batch:
+                vectors = await asyncio.to_thread(
+                    embed_texts, [text for *_, text in batch], use_disk_cache=True
+                )
+                for entry in zip(batch, vectors):
+                    await to_write.put(entry)
+        await to_write.put(None)
+    
+    async def write() -> None:
+        done = False
+        while not done:
+            entry = await to_write.get()
+            # Group what has arrived (about one embedding batch): one bulk chunk
+            # query per page plus one task per procedure, all run together
+            chunk_rows: Dict[str, List[Dict[str, Any]]] = {}
+            writes = []
+            while entry is not None:
+                (kind, page_id, payload, _), vector = entry
+                if kind == "chunk":
+                    chunk_rows.setdefault(page_id, []).append({**payload, "embedding": vector})
+                else:
+                    writes.append(_store_procedure(limit, page_id, payload, vector))
+                counts[kind] += 1
+                try:
+                    entry = to_write.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            done = entry is None
+            writes.extend(
+                _graph_write(limit, graph_service.create_chunks_bulk, page_id=page_id, chunks=rows)
+                for page_id, rows in chunk_rows.items()
+            )
+            await asyncio.gather(*writes)
+    
+    stages = [asyncio.create_task(stage()) for stage in (produce, embed, write)]
+    try:
+        await asyncio.gather(*stages)
+    except BaseException:
+        # A failed stage would leave the others blocked on their queues
+        for stage in stages:
+            stage.cancel()
+        raise
+    return counts["chunk"], counts["procedure"]
+
+
 async def ingest_docs_from_url(
     company_id: str,
     root_url: str,
@@ -444,84 +653,38 @@ async def ingest_docs_from_url(
     source_id = doc_source["id"]
     
     try:
-        # Crawl pages
-        pages = crawl_docs(root_url, max_pages=max_pages)
+        limit = asyncio.Semaphore(GRAPH_WRITE_CONCURRENCY)
+        pages_crawled = 0
         
-        total_chunks = 0
-        total_procedures = 0
-        
-        for page_data in pages:
-            # Create page node
-            page = graph_service.create_doc_page(
-                source_id=source_id,
-                url=page_data["url"],
-                title=page_data["title"],
-                text=page_data["text"][:10000],  # Limit stored text
-                headings=page_data["headings"]
-            )
-            page_id = page["id"]
-            
-            # Chunk the page
-            chunks = chunk_page(page_data["text"])
-            
-            # Embed chunks in batches
-            chunk_texts = [c["text"] for c in chunks]
-            embeddings = embed_texts(chunk_texts)
-            
-            # Store chunks
-            for chunk, embedding in zip(chunks, embeddings):
-                graph_service.create_chunk(
-                    page_id=page_id,
-                    text=chunk["text"],
-                    embedding=embedding,
-                    chunk_index=chunk["chunk_index"],
-                    heading=chunk.get("heading")
-                )
-                total_chunks += 1
-            
-            # Extract and store procedures
-            procedures = extract_procedures(page_data["text"], page_data["title"])
-            
-            for proc_data in procedures:
-                # Embed the goal
-                goal_embedding = embed_text(proc_data["goal"])
-                
-                # Create procedure
-                procedure = graph_service.create_procedure(
-                    page_id=page_id,
-                    goal=proc_data["goal"],
-                    goal_embedding=goal_embedding,
-                    source_text="\n".join([s["instruction"] for s in proc_data["steps"]])
+        async def crawled_pages():
+            nonlocal pages_crawled
+            # Crawl feeds the pipeline directly: pages are chunked/embedded while later ones download
+            async for page_data in iter_crawled_docs(root_url, max_pages=max_pages):
+                pages_crawled += 1
+                # Create page node
+                page = await _graph_write(
+                    limit,
+                    graph_service.create_doc_page,
+                    source_id=source_id,
+                    url=page_data["url"],
+                    title=page_data["title"],
+                    text=page_data["text"][:10000],  # Limit stored text
+                    headings=page_data["headings"]
                 )
-                procedure_id = procedure["id"]
-                
-                # Create steps
-                step_ids = []
-                for step_data in proc_data["steps"]:
-                    step = graph_service.create_step(
-                        procedure_id=procedure_id,
-                        step_index=step_data["idx"],
-                        instruction=step_data["instruction"],
-                        action_type=step_data["action_type"],
-                        selector_hint=step_data.get("selector_hint"),
-                        expected_state=step_data.get("expected_state")
-                    )
-                    step_ids.append(step["id"])
-                
-                # Link steps sequentially
-                graph_service.link_steps_sequential(step_ids)
-                total_procedures += 1
+                yield page["id"], page_data["text"], page_data["title"]
+        
+        total_chunks, total_procedures = await _run_pipeline(crawled_pages(), limit)
         
         # Update source status
         graph_service.update_doc_source_status(
             source_id=source_id,
             status="completed",
-            page_count=len(pages)
+            page_count=pages_crawled
         )
         
         result = {
             "source_id": source_id,
-            "pages_crawled": len(pages),
+            "pages_crawled": pages_crawled,
             "chunks_created": total_chunks,
             "procedures_extracted": total_procedures,
             "status": "completed"
@@ -592,51 +755,12 @@ async def ingest_docs_from_file(
         )
         page_id = page["id"]
         
-        # Chunk the content
-        chunks = chunk_page(text)
+        async def uploaded_page():
+            yield page_id, text, title
         
-        # Embed chunks
-        chunk_texts = [c["text"] for c in chunks]
-        embeddings = embed_texts(chunk_texts)
-        
-        # Store chunks
-        for chunk, embedding in zip(chunks, embeddings):
-            graph_service.create_chunk(
-                page_id=page_id,
-                text=chunk["text"],
-                embedding=embedding,
-                chunk_index=chunk["chunk_index"],
-                heading=chunk.get("heading")
-            )
-        
-        # Extract procedures
-        procedures = extract_procedures(text, title)
-        total_procedures = 0
-        
-        for proc_data in procedures:
-            goal_embedding = embed_text(proc_data["goal"])
-            
-            procedure = graph_service.create_procedure(
-                page_id=page_id,
-                goal=proc_data["goal"],
-                goal_embedding=goal_embedding,
-                source_text="\n".join([s["instruction"] for s in proc_data["steps"]])
-            )
-            
-            step_ids = []
-            for step_data in proc_data["steps"]:
-                step = graph_service.create_step(
-                    procedure_id=procedure["id"],
-                    step_index=step_data["idx"],
-                    instruction=step_data["instruction"],
-                    action_type=step_data["action_type"],
-                    selector_hint=step_data.get("selector_hint"),
-                    expected_state=step_data.get("expected_state")
-                )
-                step_ids.append(step["id"])
-            
-            graph_service.link_steps_sequential(step_ids)
-            total_procedures += 1
+        # Chunk, embed and store the content
+        limit = asyncio.Semaphore(GRAPH_WRITE_CONCURRENCY)
+        total_chunks, total_procedures = await _run_pipeline(uploaded_page(), limit)
         
         # Update source status
         graph_service.update_doc_source_status(
@@ -648,7 +772,7 @@ async def ingest_docs_from_file(
         return {
             "source_id": source_id,
             "pages_crawled": 1,
-            "chunks_created": len(chunks),
+            "chunks_created": total_chunks,
             "procedures_extracted": total_procedures,
             "status": "completed"
         }
@@ -0,0 +1,87 @@
+"""
+On-disk embedding cache (SQLite).
+
+Keeps vectors across process restarts so re-running an ingestion doesn't
+re-embed text Voyage has already seen. Keys are BLAKE2b digests of
+model + text; vectors are stored as float16 bytes (half the size of float32,
+far below the precision cosine ranking needs).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Relative cache paths resolve here, not against whatever the CWD happens to be
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stay under SQLite's bound-parameter limit on older builds (999)
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingDiskCache:
+    def __init__(self, path: str) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Ingestion embeds from worker threads; one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS emb (hash BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+
+    @staticmethod
+    def key(model: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{model}:{text}".encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """Cached vectors for whichever of `texts` have one."""
+        keys = {self.key(model, t): t for t in texts}
+        rows = []
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), _LOOKUP_BATCH):
+                batch = key_list[i:i + _LOOKUP_BATCH]
+                rows.extend(self._conn.execute(
+                    f"SELECT hash, vec FROM emb WHERE hash IN ({','.join('?' * len(batch))})", batch
+                ))
+        if not rows:
+            return {}
+        # One model -> one dimension, so decode every hit as a single matrix
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float16).reshape(len(rows), -1)
+        return {keys[digest]: vec for (digest, _), vec in zip(rows, matrix.astype(np.float32).tolist())}
+
+    def put_many(self, model: str, embeddings: Dict[str, Sequence[float]]) -> None:
+        rows = [
+            (self.key(model, text), np.asarray(vec, dtype=np.float16).tobytes())
+            for text, vec in embeddings.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO emb (hash, vec) VALUES (?, ?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@functools.lru_cache(maxsize=1)
+def get_disk_cache() -> Optional[EmbeddingDiskCache]:
+    """Process-wide cache at settings.embedding_disk_cache_path; None when disabled."""
+    if not settings.embedding_disk_cache_path:
+        return None
+    path = os.path.join(_BACKEND_DIR, settings.embedding_disk_cache_path)  # Absolute paths win
+    try:
+        return EmbeddingDiskCache(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Embedding disk cache unavailable ({path}): {e}")
+        return None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import logging
 from typing import List
 
@@ -14,6 +15,22 @@ class EmbeddingsError(RuntimeError):
     pass
 
 
+@functools.lru_cache(maxsize=1)
+def get_voyage_client():
+    """Process-wide Voyage client, so its HTTP connections are reused across calls."""
+    import voyageai  # type: ignore
+
+    return voyageai.Client(api_key=settings.voyage_api_key)
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_voyage_client():
+    """Process-wide async Voyage client (created lazily, on first use)."""
+    import voyageai  # type: ignore
+
+    return voyageai.AsyncClient(api_key=settings.voyage_api_key)
+
+
 async def embed_text(text: str) -> List[float]:
     """
     Generate embedding using Voyage AI.
@@ -23,10 +40,7 @@ async def embed_text(text: str) -> List[float]:
 
     def _embed_sync() -> List[float]:
         try:
-            import voyageai  # type: ignore
-
-            vo = voyageai.Client(api_key=settings.voyage_api_key)
-            result = vo.embed([text], model="voyage-2")
+            result = get_voyage_client().embed([text], model="voyage-2")
             return result.embeddings[0]
         except Exception as e:  # pragma: no cover (exact SDK exceptions vary)
             raise EmbeddingsError(str(e)) from e
@@ -4,7 +4,7 @@ Neo4j Graph Service for Document Knowledge Base + Commerce
 Schema:
 - Nodes: Company, DocSource, DocPage, Chunk, Procedure, Step, UIState, Decision
          UserProfile, Preference, Product, NutritionClaim, ProductEvidence,
-         Comparison, CartSession, PurchaseStep
+         Comparison, CartSession, PurchaseStep, SchemaMeta
 - Relationships: HAS_SOURCE, HAS_PAGE, HAS_CHUNK, DERIVED_FROM, HAS_STEP, NEXT,
                  REQUIRES_STATE, PRODUCES_STATE, FOLLOWS, JUSTIFIED_BY,
                  HAS_PREFERENCE, SELLS, HAS_NUTRITION, SUPPORTED_BY, BASELINE,
@@ -25,6 +25,9 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever setup_schema / setup_vector_index change, so startup reapplies them
+SCHEMA_VERSION = 1
+
 
 class GraphService:
     """Neo4j graph database service for document knowledge base."""
@@ -61,6 +64,45 @@ class GraphService:
             logger.error(f"Neo4j connection failed: {e}")
             return False
     
+    @classmethod
+    def current_schema_version(cls) -> int:
+        """Schema version recorded by the last completed setup (0 if never run)."""
+        driver = cls.get_driver()
+        
+        with driver.session() as session:
+            record = session.run("MATCH (s:SchemaMeta) RETURN max(s.version) AS version").single()
+            return (record["version"] if record else None) or 0
+    
+    @classmethod
+    def set_schema_version(cls, version: int) -> None:
+        driver = cls.get_driver()
+        
+        query = """
+        MERGE (s:SchemaMeta {id: 'schema'})
+        SET s.version = $version, s.updated_at = datetime()
+        """
+        
+        with driver.session() as session:
+            session.run(query, version=version)
+    
+    @classmethod
+    def ensure_schema(cls, force: bool = False) -> bool:
+        """
+        Run setup_schema + setup_vector_index unless SCHEMA_VERSION is already applied.
+        
+        Saves the ~25 IF NOT EXISTS round-trips on every startup/script run.
+        Returns True if setup ran.
+        """
+        if not force and cls.current_schema_version() >= SCHEMA_VERSION:
+            logger.debug(f"Neo4j schema v{SCHEMA_VERSION} already applied")
+            return False
+        
+        cls.setup_schema()
+        if cls.setup_vector_index():
+            # Only record the version once everything applied, so a failed run is retried
+            cls.set_schema_version(SCHEMA_VERSION)
+        return True
+    
     @classmethod
     def setup_schema(cls) -> None:
         """Create constraints and indexes for the knowledge base schema."""
@@ -118,10 +160,12 @@ class GraphService:
         logger.info("Neo4j schema setup complete")
     
     @classmethod
-    def setup_vector_index(cls) -> None:
-        """Create vector indexes for embeddings (requires Neo4j 5.11+)."""
+    def setup_vector_index(cls) -> bool:
+        """Create vector indexes for embeddings (requires Neo4j 5.11+). Returns success."""
         driver = cls.get_driver()
         
+        # Neo4j vector indexes only offer cosine/euclidean (no dot product).
+        # Voyage embeddings are unit length, so cosine already ranks like dot.
         vector_indexes = [
             # Vector index for Chunk embeddings
             """
@@ -150,8 +194,10 @@ class GraphService:
                 for query in vector_indexes:
                     session.run(query)
             logger.info("Vector indexes created (Chunk + Product embeddings)")
+            return True
         except Exception as e:
             logger.warning(f"Vector index creation failed (may need Neo4j 5.11+): {e}")
+            return False
 
     # =========================================================================
     # Company CRUD
@@ -344,6 +390,47 @@ class GraphService:
             record = result.single()
             return {"id": record["id"]} if record else None
 
+    @classmethod
+    def create_chunks_bulk(cls, page_id: str, chunks: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create or update a page's chunks in one query.
+        
+        `chunks` are dicts with chunk_index, text, embedding and optional heading.
+        Chunks are MERGEd on (page, chunk_index), so re-ingesting a page updates
+        its chunks instead of duplicating them. Returns chunk ids in input order.
+        """
+        if not chunks:
+            return []
+        
+        driver = cls.get_driver()
+        # Embeddings stay LIST<FLOAT>: the vector index can't read a BYTES property,
+        # and Bolt already packs floats as 8-byte binary, not text
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "chunk_index": c["chunk_index"],
+                "text": c["text"],
+                "embedding": c["embedding"],
+                "heading": c.get("heading"),
+            }
+            for c in chunks
+        ]
+        
+        query = """
+        MATCH (p:DocPage {id: $page_id})
+        UNWIND $chunks AS row
+        MERGE (p)-[:HAS_CHUNK]->(ch:Chunk {chunk_index: row.chunk_index})
+        ON CREATE SET ch.id = row.id, ch.created_at = datetime()
+        SET ch.text = row.text,
+            ch.embedding = row.embedding,
+            ch.heading = row.heading
+        RETURN ch.id AS id
+        """
+        
+        with driver.session() as session:
+            result = session.run(query, page_id=page_id, chunks=rows)
+            return [record["id"] for record in result]
+
     # =========================================================================
     # Procedure & Step CRUD
     # =========================================================================
@@ -428,6 +515,56 @@ class GraphService:
             record = result.single()
             return dict(record["s"]) if record else None
     
+    @classmethod
+    def create_steps_bulk(cls, procedure_id: str, steps: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create all steps of a procedure and their NEXT chain in one query.
+        
+        `steps` are dicts with idx, instruction, action_type and optional
+        selector_hint / expected_state; NEXT follows list order. Returns step ids.
+        """
+        if not steps:
+            return []
+        
+        driver = cls.get_driver()
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "step_index": s["idx"],
+                "instruction": s["instruction"],
+                "action_type": s["action_type"],
+                "selector_hint": s.get("selector_hint"),
+                "expected_state": s.get("expected_state"),
+            }
+            for s in steps
+        ]
+        
+        query = """
+        MATCH (pr:Procedure {id: $procedure_id})
+        UNWIND range(0, size($steps) - 1) AS i
+        WITH pr, i, $steps[i] AS row
+        CREATE (s:Step {
+            id: row.id,
+            step_index: row.step_index,
+            instruction: row.instruction,
+            action_type: row.action_type,
+            selector_hint: row.selector_hint,
+            expected_state: row.expected_state,
+            created_at: datetime()
+        })
+        CREATE (pr)-[:HAS_STEP]->(s)
+        WITH i, s ORDER BY i
+        WITH collect(s) AS created
+        FOREACH (j IN range(0, size(created) - 2) |
+            FOREACH (a IN [created[j]] |
+                FOREACH (b IN [created[j + 1]] | CREATE (a)-[:NEXT]->(b))))
+        RETURN size(created) AS count
+        """
+        
+        with driver.session() as session:
+            session.run(query, procedure_id=procedure_id, steps=rows).consume()
+        return [row["id"] for row in rows]
+    
     @classmethod
     def link_steps_sequential(cls, step_ids: List[str]) -> None:
         """Create NEXT relationships between sequential steps."""
@@ -436,15 +573,16 @@ class GraphService:
         if len(step_ids) < 2:
             return
         
+        # All pairs in one round-trip
         query = """
-        MATCH (s1:Step {id: $from_id})
-        MATCH (s2:Step {id: $to_id})
+        UNWIND range(0, size($step_ids) - 2) AS i
+        MATCH (s1:Step {id: $step_ids[i]})
+        MATCH (s2:Step {id: $step_ids[i + 1]})
         CREATE (s1)-[:NEXT]->(s2)
         """
         
         with driver.session() as session:
-            for i in range(len(step_ids) - 1):
-                session.run(query, from_id=step_ids[i], to_id=step_ids[i + 1])
+            session.run(query, step_ids=step_ids).consume()
     
     @classmethod
     def create_ui_state(
@@ -7,12 +7,16 @@ Includes commerce procedures for Shopify buying flow.
 
 from __future__ import annotations
 
+import functools
 import logging
-from typing import Any, Dict, List, Optional
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.config import settings
 from app.services.graph import graph_service
 from app.services.doc_ingestion import embed_text
+from app.utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -170,6 +174,7 @@ def find_element_selector(
         return None
     
     hint_lower = hint.lower()
+    hint_words = hint_lower.split()  # Once per hint, not once per element
     elements = ui_context.get("elements", [])
     
     best_match = None
@@ -188,7 +193,7 @@ def find_element_selector(
         score = 0.0
         if hint_lower in elem_text:
             score = 0.8
-        elif any(word in elem_text for word in hint_lower.split()):
+        elif any(word in elem_text for word in hint_words):
             score = 0.5
         
         # Boost for exact match
@@ -372,129 +377,147 @@ async def get_relevant_context(
 # Commerce Buying Flow
 # ============================================================================
 
+@dataclass(frozen=True, slots=True)
+class PurchaseStep:
+    name: str
+    instruction: str
+    action_type: str
+    selector_hints: Tuple[str, ...]
+    expected_state: str
+    requires_confirmation: bool = False
+
+
 # Standard Shopify purchase steps
-PURCHASE_STEPS = [
-    {
-        "name": "search_product",
-        "instruction": "Search for the product using the search bar",
-        "action_type": "type",
-        "selector_hints": ["search", "search-input", "[type='search']", "[placeholder*='Search']"],
-        "expected_state": "On store homepage or search results page",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "open_product",
-        "instruction": "Click on the product to open its page",
-        "action_type": "click",
-        "selector_hints": ["product-title", "product-link", ".product-card"],
-        "expected_state": "Search results showing the product",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "add_to_cart",
-        "instruction": "Click the Add to Cart button",
-        "action_type": "click",
-        "selector_hints": ["add-to-cart", "AddToCart", "[name='add']", "button:contains('Add to Cart')"],
-        "expected_state": "On product page with Add to Cart visible",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "view_cart",
-        "instruction": "Go to cart to review items",
-        "action_type": "click",
-        "selector_hints": ["cart", "cart-icon", ".cart-link", "a[href*='cart']"],
-        "expected_state": "Product added confirmation shown",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "proceed_checkout",
-        "instruction": "Proceed to checkout",
-        "action_type": "click",
-        "selector_hints": ["checkout", "Checkout", "[name='checkout']", "button:contains('Checkout')"],
-        "expected_state": "On cart page with items",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "enter_shipping",
-        "instruction": "Enter shipping information (email, address)",
-        "action_type": "type",
-        "selector_hints": ["email", "shipping-address", "[autocomplete='email']"],
-        "expected_state": "On checkout shipping step",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "continue_to_payment",
-        "instruction": "Continue to payment step",
-        "action_type": "click",
-        "selector_hints": ["continue", "Continue to payment", "[data-step='payment']"],
-        "expected_state": "Shipping info completed",
-        "requires_confirmation": False,
-    },
-    {
-        "name": "review_order",
-        "instruction": "Review order details before final confirmation - STOP HERE AND REQUEST USER CONFIRMATION",
-        "action_type": "wait",
-        "selector_hints": [],
-        "expected_state": "On payment/review page",
-        "requires_confirmation": True,  # CRITICAL: Must stop here
-    },
-]
-
-
-def get_purchase_step_by_name(step_name: str) -> Optional[Dict[str, Any]]:
+PURCHASE_STEPS: Tuple[PurchaseStep, ...] = (
+    PurchaseStep(
+        name="search_product",
+        instruction="Search for the product using the search bar",
+        action_type="type",
+        selector_hints=("search", "search-input", "[type='search']", "[placeholder*='Search']"),
+        expected_state="On store homepage or search results page",
+    ),
+    PurchaseStep(
+        name="open_product",
+        instruction="Click on the product to open its page",
+        action_type="click",
+        selector_hints=("product-title", "product-link", ".product-card"),
+        expected_state="Search results showing the product",
+    ),
+    PurchaseStep(
+        name="add_to_cart",
+        instruction="Click the Add to Cart button",
+        action_type="click",
+        selector_hints=("add-to-cart", "AddToCart", "[name='add']", "button:contains('Add to Cart')"),
+        expected_state="On product page with Add to Cart visible",
+    ),
+    PurchaseStep(
+        name="view_cart",
+        instruction="Go to cart to review items",
+        action_type="click",
+        selector_hints=("cart", "cart-icon", ".cart-link", "a[href*='cart']"),
+        expected_state="Product added confirmation shown",
+    ),
+    PurchaseStep(
+        name="proceed_checkout",
+        instruction="Proceed to checkout",
+        action_type="click",
+        selector_hints=("checkout", "Checkout", "[name='checkout']", "button:contains('Checkout')"),
+        expected_state="On cart page with items",
+    ),
+    PurchaseStep(
+        name="enter_shipping",
+        instruction="Enter shipping information (email, address)",
+        action_type="type",
+        selector_hints=("email", "shipping-address", "[autocomplete='email']"),
+        expected_state="On checkout shipping step",
+    ),
+    PurchaseStep(
+        name="continue_to_payment",
+        instruction="Continue to payment step",
+        action_type="click",
+        selector_hints=("continue", "Continue to payment", "[data-step='payment']"),
+        expected_state="Shipping info completed",
+    ),
+    PurchaseStep(
+        name="review_order",
+        instruction="Review order details before final confirmation - STOP HERE AND REQUEST USER CONFIRMATION",
+        action_type="wait",
+        selector_hints=(),
+        expected_state="On payment/review page",
+        requires_confirmation=True,  # CRITICAL: Must stop here
+    ),
+)
+_STEP_INDEX: Dict[str, int] = {step.name: i for i, step in enumerate(PURCHASE_STEPS)}
+
+
+def get_purchase_step_by_name(step_name: str) -> Optional[PurchaseStep]:
     """Get a purchase step by its name."""
-    for i, step in enumerate(PURCHASE_STEPS):
-        if step["name"] == step_name:
-            return {**step, "index": i}
-    return None
+    i = _STEP_INDEX.get(step_name)
+    return PURCHASE_STEPS[i] if i is not None else None
 
 
-def get_next_purchase_step(current_step_name: Optional[str]) -> Optional[Dict[str, Any]]:
+def get_next_purchase_step(current_step_name: Optional[str]) -> Optional[PurchaseStep]:
     """Get the next step after the current one."""
     if not current_step_name:
-        return {**PURCHASE_STEPS[0], "index": 0}
+        return PURCHASE_STEPS[0]
     
-    for i, step in enumerate(PURCHASE_STEPS):
-        if step["name"] == current_step_name:
-            if i + 1 < len(PURCHASE_STEPS):
-                return {**PURCHASE_STEPS[i + 1], "index": i + 1}
+    i = _STEP_INDEX.get(current_step_name)
+    if i is not None and i + 1 < len(PURCHASE_STEPS):
+        return PURCHASE_STEPS[i + 1]
     return None
 
 
-def match_purchase_step_to_ui(step: Dict[str, Any], ui_context: Dict[str, Any]) -> Dict[str, Any]:
+_CONTAINS_LITERAL = re.compile(r":contains\(['\"](.+?)['\"]\)")
+
+
+@functools.lru_cache(maxsize=64)
+def _hint_matcher(selector_hints: Tuple[str, ...]) -> KeywordMatcher:
+    """
+    One matcher over all of a step's hints (group i = hint i), built once per step.
+    
+    A `:contains('X')` hint also matches on its literal X, since that's the text
+    the element would show.
+    """
+    groups = []
+    for hint in selector_hints:
+        hint_lower = hint.lower()
+        groups.append([hint_lower, *(lit.lower() for lit in _CONTAINS_LITERAL.findall(hint))])
+    return KeywordMatcher(groups)
+
+
+def match_purchase_step_to_ui(step: PurchaseStep, ui_context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Match a purchase step to the current UI context.
     
     Returns action with best matching selector.
     """
     action = {
-        "type": step["action_type"],
-        "instruction": step["instruction"],
-        "step_name": step["name"],
-        "requires_confirmation": step.get("requires_confirmation", False),
+        "type": step.action_type,
+        "instruction": step.instruction,
+        "step_name": step.name,
+        "requires_confirmation": step.requires_confirmation,
     }
     
     elements = ui_context.get("elements", [])
-    selector_hints = step.get("selector_hints", [])
+    matcher = _hint_matcher(step.selector_hints)
     
-    # Try to find matching element
-    for hint in selector_hints:
-        hint_lower = hint.lower()
-        for elem in elements:
-            elem_selector = elem.get("selector", "")
-            elem_text = elem.get("text", "").lower()
-            
-            # Match by selector hint
-            if hint_lower in elem_selector.lower():
-                action["selector"] = elem_selector
-                action["matched_element"] = elem
-                return action
-            
-            # Match by text
-            if hint_lower in elem_text:
-                action["selector"] = elem_selector
-                action["matched_element"] = elem
-                return action
+    # Earlier hints win; among elements matching the same hint, the first one wins
+    best_elem = None
+    best_bit = 0
+    for elem in elements:
+        mask = matcher.match(elem.get("selector", "").lower()) | matcher.match(elem.get("text", "").lower())
+        if not mask:
+            continue
+        bit = mask & -mask  # Lowest set bit = earliest matching hint
+        if best_elem is None or bit < best_bit:
+            best_elem, best_bit = elem, bit
+            if bit == 1:
+                break
+    
+    if best_elem is not None:
+        action["selector"] = best_elem.get("selector", "")
+        action["matched_element"] = best_elem
+        return action
     
     # No match found - return without selector
     action["selector"] = None
@@ -565,10 +588,10 @@ async def plan_buy_action(
     
     # Use inferred step if no current step or if inferred is ahead
     if inferred_step:
-        inferred_idx = get_purchase_step_by_name(inferred_step)
-        current_idx = get_purchase_step_by_name(current_step) if current_step else None
+        inferred_idx = _STEP_INDEX.get(inferred_step)
+        current_idx = _STEP_INDEX.get(current_step) if current_step else None
         
-        if current_idx is None or (inferred_idx and inferred_idx["index"] >= (current_idx.get("index", 0) if current_idx else 0)):
+        if current_idx is None or (inferred_idx is not None and inferred_idx >= current_idx):
             current_step = inferred_step
     
     # Get next step
@@ -584,9 +607,9 @@ async def plan_buy_action(
         }
     
     # Check if this is the confirmation step
-    if next_step_data.get("requires_confirmation"):
+    if next_step_data.requires_confirmation:
         return {
-            "step_name": next_step_data["name"],
+            "step_name": next_step_data.name,
             "action": {
                 "type": "wait",
                 "instruction": "⚠️ STOP: Please review your order and confirm you want to proceed with purchase.",
@@ -605,7 +628,7 @@ async def plan_buy_action(
     action = match_purchase_step_to_ui(next_step_data, ui_context)
     
     # Special handling for type actions
-    if action["type"] == "type" and next_step_data["name"] == "search_product":
+    if action["type"] == "type" and next_step_data.name == "search_product":
         action["text"] = product.get("title", "")
     
     # Record decision trace
@@ -613,22 +636,22 @@ async def plan_buy_action(
         session_id=session_id,
         action_type=action["type"],
         action_data={
-            "step_name": next_step_data["name"],
+            "step_name": next_step_data.name,
             "product_id": product_id,
             **action
         },
     )
     
     # Add product to cart in graph if at add_to_cart step
-    if next_step_data["name"] == "add_to_cart" and cart_id:
+    if next_step_data.name == "add_to_cart" and cart_id:
         graph_service.add_item_to_cart(cart_id, product_id)
     
     return {
-        "step_name": next_step_data["name"],
+        "step_name": next_step_data.name,
         "action": action,
         "requires_confirmation": False,
         "is_complete": False,
-        "justification": f"Executing step: {next_step_data['instruction']}",
+        "justification": f"Executing step: {next_step_data.instruction}",
         "decision_id": decision["id"] if decision else None,
         "product": {
             "title": product.get("title"),
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
+import re
+from operator import attrgetter
 from typing import List
 
-from pydantic import ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from app.config import settings
 from app.models import PageFeature, PlannedStep
+from app.services.semantic_filter import feature_search_fields, semantic_filter_features
 from app.utils.helpers import JSONParseError, extract_json_object
 from app.utils.rate_limiter import call_with_retry, RateLimitError
 
+try:  # pragma: no cover
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
 # Flag to enable/disable Backboard.io (can fallback to OpenAI if needed)
@@ -21,29 +30,9 @@ class PlannerError(RuntimeError):
     pass
 
 
-def build_planner_prompt(user_goal: str, initial_features: list, url: str, page_title: str = "") -> str:
-    features = [
-        {
-            "index": f.get("index") if isinstance(f, dict) else f.index,
-            "type": f.get("type") if isinstance(f, dict) else f.type,
-            "text": f.get("text", "") if isinstance(f, dict) else (f.text or ""),
-            "placeholder": f.get("placeholder", "") if isinstance(f, dict) else (getattr(f, "placeholder", "") or ""),
-            "aria_label": f.get("aria_label", "") if isinstance(f, dict) else (getattr(f, "aria_label", "") or ""),
-            "href": f.get("href", "") if isinstance(f, dict) else (getattr(f, "href", "") or ""),
-            "selector": f.get("selector", "") if isinstance(f, dict) else (f.selector or ""),
-            "already_clicked": f.get("already_clicked", False) if isinstance(f, dict) else getattr(f, "already_clicked", False),
-        }
-        for f in initial_features[:20]  # Reduced for speed
-    ]
-    features_json = json.dumps(features, ensure_ascii=False)
-
-    return f"""
-You are a precise web automation planner.
-
-GOAL: {user_goal}
-PAGE_TITLE: {page_title}
-URL: {url}
-ELEMENTS_JSON: {features_json}
+# Static parts of the planner prompt, built once at import instead of per request
+_PROMPT_PREAMBLE = "You are a precise web automation planner.\n\n"
+_PROMPT_RULES = """
 
 CRITICAL RULES:
 - FIRST: Check if the current URL and PAGE_TITLE indicate the goal is already achieved or very close
@@ -102,27 +91,142 @@ CRITICAL RULES:
 
 OUTPUT:
 Return JSON only, exactly:
-{{
+{
   "steps": [
-    {{
+    {
       "step_number": 1,
       "action": "CLICK|TYPE|SCROLL|WAIT|DONE",
       "description": "...",
-      "target_hints": {{
+      "target_hints": {
         "type": "input|button|link",
         "text_contains": ["..."],
         "placeholder_contains": ["..."],
         "selector_pattern": null,
         "role": null
-      }},
+      },
       "text_input": null,
       "expected_page_change": false
-    }}
+    }
   ]
-}}
-""".strip()
+}"""
+
+
+def _dumps_compact(obj) -> str:
+    """Compact JSON (no spaces, UTF-8 kept as-is); orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _planner_feature(f) -> dict:
+    """Planner view of a feature, from either a feature dict or a PageFeature."""
+    get = f.get if isinstance(f, dict) else functools.partial(getattr, f)
+    return {
+        "index": get("index", None),
+        "type": get("type", None),
+        "text": get("text", "") or "",
+        "placeholder": get("placeholder", "") or "",
+        "aria_label": get("aria_label", "") or "",
+        "href": get("href", "") or "",
+        "selector": get("selector", "") or "",
+        "already_clicked": get("already_clicked", False),
+    }
+
+
+def build_planner_prompt(user_goal: str, initial_features: list, url: str, page_title: str = "") -> str:
+    features = [_planner_feature(f) for f in initial_features[:20]]  # Reduced for speed
+    features_json = _dumps_compact(features)
+
+    return "".join((
+        _PROMPT_PREAMBLE,
+        f"GOAL: {user_goal}\nPAGE_TITLE: {page_title}\nURL: {url}\nELEMENTS_JSON: ",
+        features_json,
+        _PROMPT_RULES,
+    ))
+
+class _PlannerOutput(BaseModel):
+    steps: List[PlannedStep]
+
+
+_STEPS_ADAPTER = TypeAdapter(List[PlannedStep])
+_STEP_ORDER = attrgetter("step_number")
+
+_STEPS_ARRAY_START = re.compile(r'"steps"\s*:\s*\[')
+_JSON_DECODER = json.JSONDecoder()
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+
+class StreamingStepParser:
+    """
+    Pulls complete step objects out of a planner response while it streams in.
+
+    Each object in the "steps" array is validated as soon as its closing brace
+    arrives. `complete` is only True once the array has closed cleanly; anything
+    else (no array, an invalid step) is left to parse_planner_steps on `text`.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._buffer = ""
+        self._pos: int | None = None  # Next unparsed offset inside the steps array
+        self.steps: List[PlannedStep] = []
+        self.done = False
+        self.failed = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    @property
+    def complete(self) -> bool:
+        return self.done and not self.failed and bool(self.steps)
+
+    def feed(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        if self.done or self.failed:
+            return
+        self._buffer += chunk
+        if self._pos is None:
+            match = _STEPS_ARRAY_START.search(self._buffer)
+            if match is None:
+                return
+            self._pos = match.end()
+        elif "}" not in chunk and "]" not in chunk:
+            return  # Nothing new can have closed
+
+        buf = self._buffer
+        while True:
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _ARRAY_SEPARATORS:
+                pos += 1
+            if pos >= len(buf):
+                return
+            if buf[pos] == "]":
+                self.done = True
+                return
+            try:
+                obj, end = _JSON_DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                return  # Step still arriving
+            try:
+                self.steps.append(PlannedStep.model_validate(obj))
+            except ValidationError:
+                self.failed = True
+                return
+            self._pos = end
+
 
 def parse_planner_steps(raw_text: str) -> List[PlannedStep]:
+    # Fast path: bare JSON output is parsed and validated in a single pydantic-core pass
+    try:
+        parsed = _PlannerOutput.model_validate_json(raw_text).steps
+    except ValidationError:
+        parsed = []
+    if parsed:
+        parsed.sort(key=_STEP_ORDER)
+        return parsed
+
+    # Slow path: fenced or chatty output, with precise error reporting
     try:
         data = extract_json_object(raw_text)
     except JSONParseError as e:
@@ -132,32 +236,100 @@ def parse_planner_steps(raw_text: str) -> List[PlannedStep]:
     if not isinstance(steps, list) or not steps:
         raise PlannerError("Planner output missing non-empty 'steps' list")
 
-    parsed: List[PlannedStep] = []
-    for i, step in enumerate(steps):
-        try:
-            parsed.append(PlannedStep.model_validate(step))
-        except ValidationError as e:
-            raise PlannerError(f"Invalid step at index {i}: {e}") from e
+    try:
+        parsed = _STEPS_ADAPTER.validate_python(steps)
+    except ValidationError as e:
+        index = e.errors()[0]["loc"][0]
+        raise PlannerError(f"Invalid step at index {index}: {e}") from e
 
-    parsed.sort(key=lambda s: s.step_number)
+    parsed.sort(key=_STEP_ORDER)
     return parsed
 
 
-def _call_openai_sync(prompt: str) -> str:
+@functools.lru_cache(maxsize=1)
+def _get_openai_client():
+    """Process-wide async OpenAI client (created lazily, on first use)."""
+    from openai import AsyncOpenAI  # type: ignore
+
+    return AsyncOpenAI(api_key=settings.openai_api_key)
+
+
+async def _call_openai(prompt: str) -> StreamingStepParser:
     """
-    Synchronous OpenAI call (wrapped by rate limiter).
+    Async streamed OpenAI call (wrapped by rate limiter).
+    Steps are parsed while the completion is still arriving; callers take the
+    result with _planner_steps, outside the retry.
     """
-    from openai import OpenAI  # type: ignore
-
-    client = OpenAI(api_key=settings.openai_api_key)
-    response = client.chat.completions.create(
+    stream = await _get_openai_client().chat.completions.create(
         model="gpt-4o-mini",  # Fast and cheap model
         messages=[
             {"role": "user", "content": prompt}
         ],
         temperature=0.2,
+        stream=True,
     )
-    return response.choices[0].message.content or ""
+    parser = StreamingStepParser()
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parser.feed(chunk.choices[0].delta.content)
+
+    logger.debug("AI response:\n%s", parser.text)
+    return parser
+
+
+def _planner_steps(parser: StreamingStepParser) -> List[PlannedStep]:
+    if parser.complete:
+        parser.steps.sort(key=_STEP_ORDER)
+        return parser.steps
+    # Fenced/chatty output or an invalid step: buffered parse for the proper error
+    return parse_planner_steps(parser.text)
+
+
+def _filter_feature(f: PageFeature) -> dict:
+    """
+    Feature dict for the semantic filter, built in one pass. Also carries the
+    filter's derived "_search_text" / "_text_lower" so it doesn't re-walk the fields.
+    """
+    text = f.text or ""
+    placeholder = getattr(f, "placeholder", "") or ""
+    aria_label = getattr(f, "aria_label", "") or ""
+    href = getattr(f, "href", "") or ""
+    search_text, text_lower = feature_search_fields(text, placeholder, aria_label, href)
+    return {
+        "selector": getattr(f, "selector", ""),
+        "index": f.index,
+        "type": f.type,
+        "text": text,
+        "placeholder": placeholder,
+        "aria_label": aria_label,
+        "href": href,
+        "value": getattr(f, "value", "") or "",
+        "already_clicked": getattr(f, "already_clicked", False),
+        "_search_text": search_text,
+        "_text_lower": text_lower,
+    }
+
+
+def _log_features_sent(user_goal: str, url: str, filtered_by_type: dict) -> None:
+    """Debug dump of the ranked elements the planner is about to send to the AI."""
+    lines = [
+        "ELEMENTS BEING SENT TO AI:",
+        f"Goal: {user_goal}",
+        f"URL: {url}",
+    ]
+    for label, key, limit, fallback in (
+        ("INPUTS", "inputs", 15, "placeholder"),
+        ("BUTTONS", "buttons", 15, None),
+        ("LINKS", "links", 20, "href"),
+    ):
+        lines.append(f"{label}:")
+        for idx, feat in enumerate(filtered_by_type.get(key, [])[:limit], 1):
+            score = feat.get('_similarity_score', 0.0)
+            text = feat.get('text', '')[:40] or (feat.get(fallback, '')[:40] if fallback else '')
+            clicked = "✓" if feat.get('already_clicked') else " "
+            lines.append(f"  {idx:2d}. [{clicked}] {text:40s} (score: {score:.3f})")
+    # One record instead of one per line
+    logger.debug("\n".join(lines))
 
 
 async def generate_workflow_plan(
@@ -169,28 +341,14 @@ async def generate_workflow_plan(
     Includes rate limiting and retry logic.
     Now with semantic filtering using Voyage AI!
     """
-    # Apply semantic filtering to focus on relevant elements
-    from app.services.semantic_filter import semantic_filter_features
-    
     try:
         # Convert PageFeatures to dicts for semantic filtering
         features_dict = [
-            {
-                "selector": getattr(f, "selector", ""),
-                "index": f.index,
-                "type": f.type,
-                "text": f.text or "",
-                "placeholder": getattr(f, "placeholder", "") or "",
-                "aria_label": getattr(f, "aria_label", "") or "",
-                "href": getattr(f, "href", "") or "",
-                "value": getattr(f, "value", "") or "",
-                "already_clicked": getattr(f, "already_clicked", False),
-            }
-            for f in initial_features[:110]  # Limit to 110 for embedding efficiency
+            _filter_feature(f) for f in initial_features[:110]  # Limit to 110 for embedding efficiency
         ]
         
         # Semantic filtering - returns top 25 from each category (inputs, buttons, links)
-        filtered_by_type = await semantic_filter_features(user_goal, features_dict)
+        filtered_by_type = await semantic_filter_features(user_goal, features_dict, url=url)
         # Flatten back to single list
         filtered_features = (
             filtered_by_type.get("inputs", []) +
@@ -201,82 +359,37 @@ async def generate_workflow_plan(
         input_count = len(filtered_by_type.get("inputs", []))
         button_count = len(filtered_by_type.get("buttons", []))
         link_count = len(filtered_by_type.get("links", []))
-        logger.info(f"📊 Semantic filter: {len(features_dict)} → {len(filtered_features)} features ({input_count}i + {button_count}b + {link_count}l)")
-        
-        # Log what elements are being sent to the AI
-        logger.info("=" * 80)
-        logger.info("🔍 ELEMENTS BEING SENT TO AI:")
-        logger.info(f"Goal: {user_goal}")
-        logger.info(f"URL: {url}")
-        logger.info(f"📦 Sending: {input_count} inputs, {button_count} buttons, {link_count} links (max 75 total)")
-        logger.info("-" * 80)
-        
-        # Show inputs first
-        logger.info("📝 INPUTS:")
-        for idx, feat in enumerate(filtered_by_type.get("inputs", [])[:15], 1):
-            score = feat.get('_similarity_score', 0.0)
-            text = feat.get('text', '')[:40] or feat.get('placeholder', '')[:40]
-            clicked = "✓" if feat.get('already_clicked') else " "
-            logger.info(f"  {idx:2d}. [{clicked}] {text:40s} (score: {score:.3f})")
-        
-        # Show buttons
-        logger.info("🔘 BUTTONS:")
-        for idx, feat in enumerate(filtered_by_type.get("buttons", [])[:15], 1):
-            score = feat.get('_similarity_score', 0.0)
-            text = feat.get('text', '')[:40]
-            clicked = "✓" if feat.get('already_clicked') else " "
-            logger.info(f"  {idx:2d}. [{clicked}] {text:40s} (score: {score:.3f})")
-        
-        # Show links
-        logger.info("🔗 LINKS:")
-        for idx, feat in enumerate(filtered_by_type.get("links", [])[:20], 1):
-            score = feat.get('_similarity_score', 0.0)
-            text = feat.get('text', '')[:40] or feat.get('href', '')[:40]
-            clicked = "✓" if feat.get('already_clicked') else " "
-            logger.info(f"  {idx:2d}. [{clicked}] {text:40s} (score: {score:.3f})")
+        logger.debug(
+            "Semantic filter: %d -> %d features (%di + %db + %dl)",
+            len(features_dict), len(filtered_features), input_count, button_count, link_count,
+        )
         
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            _log_features_sent(user_goal, url, filtered_by_type)
     except Exception as e:
         logger.warning(f"Semantic filtering failed, using smart fallback: {e}")
         # Fallback: top 30 from each category without semantic ranking
         by_type = {"input": [], "button": [], "link": []}
         for f in initial_features[:110]:
-            ftype = f.type
-            by_type[ftype].append({
-                "selector": getattr(f, "selector", ""),
-                "index": f.index,
-                "type": f.type,
-                "text": f.text or "",
-                "placeholder": getattr(f, "placeholder", "") or "",
-                "aria_label": getattr(f, "aria_label", "") or "",
-                "href": getattr(f, "href", "") or "",
-                "value": getattr(f, "value", "") or "",
-                "already_clicked": getattr(f, "already_clicked", False),
-            })
+            by_type[f.type].append(_filter_feature(f))
         filtered_features = by_type["input"][:30] + by_type["button"][:30] + by_type["link"][:30]
     
     prompt = build_planner_prompt(user_goal=user_goal, initial_features=filtered_features, url=url, page_title=page_title)
 
-    # Log what's being sent
-    logger.info("=" * 60)
-    logger.info("AI PLANNER REQUEST (Backboard.io Multi-Model)")
-    logger.info("=" * 60)
-    logger.info(f"User Goal: {user_goal}")
-    logger.info(f"User ID: {user_id or 'anonymous'}")
-    logger.info(f"URL: {url}")
-    logger.info(f"Features count: {len(initial_features)}")
-    logger.info(f"Using Backboard: {USE_BACKBOARD}")
-    logger.info(f"Backboard API Key set: {bool(settings.backboard_api_key)}")
-    logger.info(f"Backboard API Key value: {settings.backboard_api_key[:20]}..." if settings.backboard_api_key else "None")
-    logger.info("-" * 60)
+    logger.debug(
+        "AI planner request: goal=%r user=%s url=%s features=%d backboard=%s key_set=%s",
+        user_goal, user_id or "anonymous", url, len(initial_features),
+        USE_BACKBOARD, bool(settings.backboard_api_key),
+    )
 
     try:
+        text = None
         if USE_BACKBOARD and settings.backboard_api_key and settings.backboard_api_key != "your_backboard_api_key_here":
             # Use Backboard.io with multi-model support and adaptive memory
             try:
                 from app.services.backboard_ai import backboard_ai
                 
-                logger.info("✅ Using Backboard.io multi-model AI")
+                logger.debug("Using Backboard.io multi-model AI")
                 
                 text = await backboard_ai.generate_plan(
                     user_goal=user_goal,
@@ -285,22 +398,20 @@ async def generate_workflow_plan(
                     page_title=page_title,
                     user_id=user_id
                 )
-                logger.info("✅ Backboard.io response received")
             except Exception as backboard_error:
                 logger.error(f"❌ Backboard.io failed: {backboard_error}", exc_info=True)
                 logger.info("⚠️ Falling back to OpenAI")
-                text = await call_with_retry(_call_openai_sync, prompt)
         else:
             # Fallback to OpenAI
-            logger.info("Using OpenAI fallback (Backboard not configured)")
-            text = await call_with_retry(_call_openai_sync, prompt)
+            logger.debug("Using OpenAI fallback (Backboard not configured)")
         
-        # Log AI response
-        logger.info("-" * 60)
-        logger.info("AI RESPONSE:")
-        logger.info(text)
-        logger.info("=" * 60)
+        if text is None:
+            # OpenAI streams, so its steps are already parsed. Parse errors are
+            # handled here, not retried: their text can quote "rate limit"/"429"
+            return _planner_steps(await call_with_retry(_call_openai, prompt))
         
+        # Backboard returns the whole message at once
+        logger.debug("AI response:\n%s", text)
         return parse_planner_steps(text)
     except RateLimitError as e:
         raise PlannerError(str(e)) from e
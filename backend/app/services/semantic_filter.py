@@ -3,102 +3,437 @@ Semantic filtering using Voyage AI embeddings
 Ranks page elements by relevance to user goal
 Optimized with batch embedding and caching
 """
-import logging
-from typing import List, Dict, Any
+import asyncio
 import hashlib
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Tuple
+import anyio
 import numpy as np
-from app.config import settings
+from pymongo import UpdateOne
+from app.database import get_db
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
 # Enable/disable semantic filtering
 USE_SEMANTIC_FILTER = True
 SIMILARITY_THRESHOLD = 0.3  # Minimum similarity score to include
+# Pages this small reach the planner prompt (max 20 features) whole, whatever the
+# ranking, so they skip embedding entirely
+PASSTHROUGH_MAX_FEATURES = 20
+
+# Keyword groups used to weight features; classified in one pass per feature
+PAGINATION_KEYWORDS = ['next', 'previous', 'prev', 'page ', ' page', 'pagination']
+CATEGORY_KEYWORDS = ['men', 'women', 'woman', 'mens', 'womens', 'shop', 'category',
+                     'collection', 'apparel', 'clothing', 'accessories', 'jewelry',
+                     'shoes', 'dress', 'skirt', 'pant', 'shirt', 'top', 'bottom']
+ACTION_KEYWORDS = ['add to cart', 'add to bag', 'buy now', 'purchase', 'checkout',
+                   'add', 'submit', 'continue', 'proceed', 'confirm', 'place order',
+                   'cart', 'view cart', 'go to cart']
+MENU_KEYWORDS = ['menu', 'navigation', 'nav', 'hamburger', 'close', 'open menu']
+NAV_KEYWORDS = ['home', 'about', 'contact', 'account', 'login', 'sign in', 'cart',
+                'wishlist', 'search', 'help', 'faq', 'support', 'shipping', 'returns']
+PRODUCT_KEYWORDS = ['product', 'item', '$', 'price', 'shop', 'quick view', 'quick add',
+                    'trouser', 'pant', 'skirt', 'dress', 'shirt', 'shoe', 'jacket',
+                    'earring', 'ring', 'necklace', 'bracelet', 'jewelry', 'jewellery']
 
-# In-memory cache for embeddings (keyed by text hash)
+_PAGINATION, _CATEGORY, _ACTION, _MENU, _NAV, _PRODUCT = (1 << i for i in range(6))
+_FEATURE_KEYWORDS = KeywordMatcher([
+    PAGINATION_KEYWORDS,
+    CATEGORY_KEYWORDS,
+    ACTION_KEYWORDS,
+    MENU_KEYWORDS,
+    NAV_KEYWORDS,
+    PRODUCT_KEYWORDS,
+])
+
+# Embedding cache: a bounded in-process LRU (keyed by the embedded text itself)
+# in front of a MongoDB collection shared by every worker. Both tiers hold
+# int8-quantized vectors (1 byte per dimension plus one float scale) instead of
+# Python float lists - cosine ranking barely notices the rounding error.
 # CLEAR THIS if you change Voyage API key
-_embedding_cache: Dict[str, List[float]] = {}
+EMBEDDING_MODEL = "voyage-2"
+EMBEDDING_CACHE_SIZE = 50_000      # Max entries held in process memory
+EMBEDDING_CACHE_COLLECTION = "embeddings_cache"
+EMBEDDING_CACHE_TTL_DAYS = 30      # Mongo entries expire after this long unused
+EMBEDDING_CACHE_WARM_COUNT = 1000  # Most recent entries loaded at startup
+EMBEDDING_CACHE_TOUCH_AFTER = timedelta(days=1)  # Hits refresh updated_at at most this often
+
+# (scale, int8 bytes) - see _quantize / _dequantize
+QuantizedEmbedding = Tuple[float, bytes]
+
+_embedding_cache: LRUCache[str, QuantizedEmbedding] = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
 
+# Filter results for recently seen (goal, url, page features) combinations, stored
+# as (position in `features`, score) per category and rebuilt from the caller's
+# current dicts - fields outside the key (e.g. an input's typed `value`) stay fresh
+FILTER_RESULT_CACHE_SIZE = 1024
+_filter_result_cache: LRUCache[tuple, Dict[str, List[Tuple[int, float]]]] = LRUCache(
+    maxsize=FILTER_RESULT_CACHE_SIZE
+)
 
-def clear_embedding_cache():
+# Every feature field that influences the ranking
+_FILTER_KEY_FIELDS = ("index", "type", "selector", "text", "placeholder", "aria_label", "href", "already_clicked")
+
+
+async def clear_embedding_cache():
     """Clear the embedding cache - call this if Voyage API key changes"""
-    global _embedding_cache
     _embedding_cache.clear()
+    _filter_result_cache.clear()
+    collection = _embedding_collection()
+    if collection is not None:
+        await collection.delete_many({})
     logger.info("🗑️ Cleared embedding cache (old API key embeddings removed)")
 
 
+def _filter_cache_key(user_goal: str, url: str, features: List[Dict[str, Any]]) -> tuple:
+    """Result-cache key; compares equal only when the ranking inputs are identical."""
+    return (
+        user_goal,
+        url,
+        tuple(tuple(f.get(k) for k in _FILTER_KEY_FIELDS) for f in features),
+    )
+
+
 def _get_cache_key(text: str) -> str:
-    """Generate cache key from text"""
-    return hashlib.md5(text.encode('utf-8')).hexdigest()
+    """Cache key for a text - the string itself, dicts already hash it natively"""
+    return text
 
 
-async def _batch_embed_texts(texts: List[str]) -> List[List[float]]:
+def _quantize(embedding) -> QuantizedEmbedding:
+    """
+    L2-normalize, then symmetric int8 quantization with one scale per vector.
+    Cached vectors are unit length, so ranking is a plain dot product.
+    """
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec)) if vec.size else 0.0
+    if norm == 0.0:
+        return 0.0, bytes(vec.size)  # Zero vector - nothing to scale
+    vec = vec / norm
+    scale = float(np.abs(vec).max()) / 127.0
+    return scale, np.rint(vec / scale).astype(np.int8).tobytes()
+
+
+def _dequantize(quantized: QuantizedEmbedding) -> np.ndarray:
+    scale, data = quantized
+    return np.frombuffer(data, dtype=np.int8).astype(np.float32) * np.float32(scale)
+
+
+def _mongo_key(text: str) -> str:
+    """Fixed-size `_id` for the shared cache (texts can be long; includes the model)"""
+    return hashlib.sha1(f"{EMBEDDING_MODEL}:{text}".encode("utf-8")).hexdigest()
+
+
+def _embedding_collection():
+    """Shared cache collection, or None when MongoDB isn't connected (tests, scripts)"""
+    try:
+        return get_db()[EMBEDDING_CACHE_COLLECTION]
+    except RuntimeError:
+        return None
+
+
+async def ensure_embedding_cache_indexes(db) -> None:
+    """TTL index on updated_at; also serves the recency sort used for warming."""
+    try:
+        await db[EMBEDDING_CACHE_COLLECTION].create_index(
+            "updated_at",
+            expireAfterSeconds=EMBEDDING_CACHE_TTL_DAYS * 24 * 3600,
+            name="ttl_updated_at"
+        )
+    except Exception as e:
+        logger.warning(f"Failed to create embedding cache indexes (non-fatal): {e}")
+
+
+async def warm_embedding_cache(db, limit: int = EMBEDDING_CACHE_WARM_COUNT) -> int:
+    """Pre-load the most recently used embeddings so a fresh worker starts warm."""
+    try:
+        cursor = db[EMBEDDING_CACHE_COLLECTION].find(
+            {"q": {"$exists": True}}, {"text": 1, "scale": 1, "q": 1}
+        ).sort("updated_at", -1).limit(limit)
+        docs = await cursor.to_list(length=limit)
+    except Exception as e:
+        logger.warning(f"Failed to warm embedding cache (non-fatal): {e}")
+        return 0
+    for doc in reversed(docs):  # Most recent ends up most recently used
+        _embedding_cache[_get_cache_key(doc["text"])] = (doc["scale"], bytes(doc["q"]))
+    logger.info(f"🔥 Warmed embedding cache with {len(docs)} entries")
+    return len(docs)
+
+
+# Strong refs to fire-and-forget tasks so they aren't garbage collected mid-flight
+_background_tasks: set = set()
+
+
+def _written_before(updated_at, cutoff: datetime) -> bool:
+    if updated_at is None:
+        return True
+    if updated_at.tzinfo is None:  # PyMongo returns naive UTC unless tz_aware=True
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at < cutoff
+
+
+async def _touch_shared_embeddings(collection, ids: List[str]) -> None:
+    try:
+        await collection.update_many(
+            {"_id": {"$in": ids}}, {"$set": {"updated_at": datetime.now(timezone.utc)}}
+        )
+    except Exception as e:
+        logger.warning(f"Shared embedding cache touch failed: {e}")
+
+
+async def _load_shared_embeddings(texts: List[str]) -> Dict[str, QuantizedEmbedding]:
+    """Fetch embeddings for `texts` from the shared cache in one query."""
+    collection = _embedding_collection()
+    if collection is None or not texts:
+        return {}
+    keys = {_mongo_key(t): t for t in texts}
+    try:
+        docs = await collection.find(
+            {"_id": {"$in": list(keys)}}, {"scale": 1, "q": 1, "updated_at": 1}
+        ).to_list(length=len(keys))
+    except Exception as e:
+        logger.warning(f"Shared embedding cache lookup failed: {e}")
+        return {}
+    # Entries written before quantization have no "q" and are simply re-embedded
+    docs = [d for d in docs if "q" in d]
+
+    # Touch hits so the TTL and the startup warm-up follow use, not first write -
+    # only entries not touched recently, and off the request path
+    cutoff = datetime.now(timezone.utc) - EMBEDDING_CACHE_TOUCH_AFTER
+    stale = [d["_id"] for d in docs if _written_before(d.get("updated_at"), cutoff)]
+    if stale:
+        task = asyncio.create_task(_touch_shared_embeddings(collection, stale))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    return {keys[d["_id"]]: (d["scale"], bytes(d["q"])) for d in docs}
+
+
+async def _store_shared_embeddings(embeddings: Dict[str, QuantizedEmbedding]) -> None:
+    """Upsert freshly computed embeddings into the shared cache in one round-trip."""
+    collection = _embedding_collection()
+    if collection is None or not embeddings:
+        return
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"_id": _mongo_key(text)},
+            {
+                "$set": {"text": text, "scale": scale, "q": data, "updated_at": now},
+                "$unset": {"embedding": ""},
+            },
+            upsert=True,
+        )
+        for text, (scale, data) in embeddings.items()
+    ]
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except Exception as e:
+        logger.warning(f"Shared embedding cache write failed: {e}")
+
+
+async def _voyage_embed(texts: List[str]):
+    """Embed `texts` without blocking the event loop."""
+    import voyageai
+    from app.services.embeddings import get_async_voyage_client, get_voyage_client
+
+    if hasattr(voyageai, "AsyncClient"):
+        return await get_async_voyage_client().embed(texts, model=EMBEDDING_MODEL)
+    # Older SDKs only ship the sync client - run it in a worker thread
+    vo = get_voyage_client()
+    return await anyio.to_thread.run_sync(lambda: vo.embed(texts, model=EMBEDDING_MODEL))
+
+
+async def _batch_embed_texts(texts: List[str]) -> Tuple[List[np.ndarray], bool]:
     """
     Batch embed multiple texts using Voyage AI
-    Checks cache first, only embeds uncached texts
+    Checks the in-process cache, then the shared Mongo cache, and only embeds the rest
+    Returns (unit-length float32 vectors dequantized from the cached int8 form,
+    complete) - complete is False when a failed text got a neutral zero vector
     """
     from app.services.embeddings import embed_text, EmbeddingsError
-    import voyageai
     
     results = []
     to_embed = []
     to_embed_indices = []
+    complete = True
     
     # Check cache first
     for i, text in enumerate(texts):
-        cache_key = _get_cache_key(text)
-        if cache_key in _embedding_cache:
-            results.append(_embedding_cache[cache_key])
-        else:
-            results.append(None)  # Placeholder
+        quantized = _embedding_cache.get(_get_cache_key(text))
+        results.append(quantized)  # None is a placeholder for misses
+        if quantized is None:
             to_embed.append(text)
             to_embed_indices.append(i)
+
+    # Then the cache shared across workers
+    if to_embed:
+        shared = await _load_shared_embeddings(to_embed)
+        if shared:
+            remaining = []
+            for idx, text in zip(to_embed_indices, to_embed):
+                quantized = shared.get(text)
+                if quantized is None:
+                    remaining.append((idx, text))
+                else:
+                    results[idx] = quantized
+                    _embedding_cache[_get_cache_key(text)] = quantized
+            to_embed_indices = [idx for idx, _ in remaining]
+            to_embed = [text for _, text in remaining]
     
     # Batch embed uncached texts
     if to_embed:
+        fresh: Dict[str, QuantizedEmbedding] = {}
         try:
-            vo = voyageai.Client(api_key=settings.voyage_api_key)
-            batch_result = vo.embed(to_embed, model="voyage-2")
+            batch_result = await _voyage_embed(to_embed)
             
             # Store in cache and results
-            for idx, embedding in zip(to_embed_indices, batch_result.embeddings):
-                results[idx] = embedding
-                cache_key = _get_cache_key(to_embed[to_embed_indices.index(idx)])
-                _embedding_cache[cache_key] = embedding
+            for idx, text, embedding in zip(to_embed_indices, to_embed, batch_result.embeddings):
+                quantized = _quantize(embedding)
+                results[idx] = quantized
+                _embedding_cache[_get_cache_key(text)] = quantized
+                fresh[text] = quantized
             
-            logger.info(f"📦 Batch embedded {len(to_embed)} texts, {len(texts) - len(to_embed)} from cache")
+            logger.debug("Batch embedded %d texts, %d from cache", len(to_embed), len(texts) - len(to_embed))
         except Exception as e:
             logger.error(f"Batch embedding failed: {e}")
             # Fallback to individual embedding for uncached
             for idx in to_embed_indices:
                 try:
-                    embedding = await embed_text(texts[idx])
-                    results[idx] = embedding
-                    cache_key = _get_cache_key(texts[idx])
-                    _embedding_cache[cache_key] = embedding
+                    quantized = _quantize(await embed_text(texts[idx]))
+                    results[idx] = quantized
+                    _embedding_cache[_get_cache_key(texts[idx])] = quantized
+                    fresh[texts[idx]] = quantized
                 except Exception:
-                    results[idx] = [0.0] * 1024  # Neutral vector
+                    results[idx] = _quantize(np.zeros(1024, dtype=np.float32))  # Neutral vector
+                    complete = False
+        await _store_shared_embeddings(fresh)
     
-    return results
+    return [_dequantize(q) for q in results], complete
+
+
+def feature_search_fields(text: str, placeholder: str, aria_label: str, href: str) -> Tuple[str, str]:
+    """
+    (search_text, text_lower) for one feature: the string that gets embedded and
+    the lowercased string the keyword weighting runs against. Callers that build
+    feature dicts store them as "_search_text" / "_text_lower" so the filter
+    doesn't have to walk the fields again.
+    """
+    href_tail = href.split('/')[-1] if href else ''
+    combined = ' '.join([t for t in (text, placeholder, aria_label, href_tail) if t]).strip()
+    return combined[:500] or 'element', f"{text} {aria_label} {href}".lower()
+
+
+def _search_fields(f: Dict[str, Any]) -> Tuple[str, str]:
+    search_text = f.get('_search_text')
+    text_lower = f.get('_text_lower')
+    if search_text is None or text_lower is None:
+        return feature_search_fields(
+            f.get('text') or '', f.get('placeholder') or '', f.get('aria_label') or '', f.get('href') or ''
+        )
+    return search_text, text_lower
+
+
+def _context_weights(
+    features: List[Dict[str, Any]],
+    search_fields: List[Tuple[str, str]],
+    is_product_focused: bool,
+    goal_key_terms: List[str],
+) -> np.ndarray:
+    """Multiplicative weight per feature from its type, state and keyword flags."""
+    n = len(features)
+    types = [f.get('type') for f in features]
+    is_link = np.fromiter((t == 'link' for t in types), dtype=bool, count=n)
+    is_clickable = is_link | np.fromiter((t == 'button' for t in types), dtype=bool, count=n)
+    is_clicked = np.fromiter((bool(f.get('already_clicked', False)) for f in features), dtype=bool, count=n)
+
+    flags = np.fromiter(
+        (_FEATURE_KEYWORDS.match(text_lower) for _, text_lower in search_fields), dtype=np.uint8, count=n
+    )
+    is_pagination = (flags & _PAGINATION) != 0
+    is_product = (flags & _PRODUCT) != 0
+
+    weights = np.ones(n, dtype=np.float32)
+
+    # VERY STRONG penalty for pagination to stop loops completely
+    weights[is_pagination & is_link] *= 0.01  # Nearly eliminate pagination links from results
+
+    # Penalty for already clicked elements to avoid loops
+    weights[is_clicked] *= 0.3  # Strong penalty for previously clicked elements
+
+    # Context-aware navigation/menu filtering - APPLY BEFORE EXACT MATCH
+    # If this is a product-focused goal, heavily penalize nav/menu items
+    if is_product_focused:
+        weights[((flags & _NAV) != 0) & is_clickable] *= 0.05  # Very strong penalty for nav (including "home")
+        weights[((flags & _MENU) != 0) & is_clickable] *= 0.05  # Very strong penalty for menu
+
+        # Also penalize very short link text (likely nav)
+        is_short = np.fromiter((len((f.get('text') or '').strip()) < 4 for f in features), dtype=bool, count=n)
+        weights[is_link & is_short & ~is_product] *= 0.2  # Short nav text penalty
+
+    # EXACT WORD MATCH BOOST - Prefer exact matches (comes AFTER nav penalty)
+    # Example: "ring" should match "Rings (16)" NOT "Earrings (62)"
+    is_exact = np.zeros(n, dtype=bool)
+    if goal_key_terms:
+        # Word boundaries to match whole words only; boosted once per feature
+        exact_pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, goal_key_terms)) + r')\b')
+        for i, (_, text_lower) in enumerate(search_fields):
+            match = exact_pattern.search(text_lower)
+            if match:
+                is_exact[i] = True
+                logger.debug("Exact match boost: %r in %.50r", match.group(0), text_lower)
+    weights[is_exact] *= 5.0  # MASSIVE boost for exact word match
+
+    # Without an exact match, category navigation is useful
+    is_category = (flags & _CATEGORY) != 0
+    weights[~is_exact & is_category & is_link & ~is_pagination] *= 2.0  # Strong boost for category navigation (jewelry, women, etc)
+
+    # VERY STRONG boost for product links (actual items for sale)
+    weights[is_product & is_link & ~is_pagination] *= 4.0  # Massive boost for product links (higher than before)
+
+    # STRONG boost for action buttons (add to cart, buy now, etc.)
+    weights[((flags & _ACTION) != 0) & is_clickable] *= 2.5  # Very strong boost for action buttons
+
+    return weights
+
+
+def _top_k(indices: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """`indices` of the k highest `scores`, best first (ties keep page order)."""
+    if k <= 0:
+        return indices[:0]
+    if k < len(scores):
+        # O(N) partition to find the k-th best score, then keep everything tied
+        # with it so the sort below (not the partition) decides who makes the cut
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        keep = scores >= kth
+        indices, scores = indices[keep], scores[keep]
+    order = np.lexsort((indices, -scores))[:k]
+    return indices[order]
 
 
 async def semantic_filter_features(
     user_goal: str,
     features: List[Dict[str, Any]],
+    url: str = "",
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Filter and rank features by semantic similarity to user goal
     Returns top 25 from each category (inputs, buttons, links) - 75 total
+    Results are cached per (goal, url, features) so repeated calls on an unchanged page are free
     
     Args:
         user_goal: What the user wants to accomplish
         features: List of page features extracted from DOM
+        url: Page the features came from (part of the result cache key)
     
     Returns:
         Dict with filtered lists: {"inputs": [...], "buttons": [...], "links": [...]}
     """
-    if not USE_SEMANTIC_FILTER or not features:
-        # Group by type and return top 25 each
+    if not USE_SEMANTIC_FILTER or len(features) <= PASSTHROUGH_MAX_FEATURES:
+        # Nothing worth ranking: group by type and return top 25 each
         by_type = {"input": [], "button": [], "link": []}
         for f in features:
             ftype = f.get("type", "link")
@@ -109,8 +444,21 @@ async def semantic_filter_features(
             "links": by_type["link"][:25]
         }
     
+    cache_key = _filter_cache_key(user_goal, url, features)
+    cached = _filter_result_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Semantic filter cache hit for goal: %.50s", user_goal)
+        result = {}
+        for category, picks in cached.items():
+            selected = []
+            for i, score in picks:
+                features[i]['_similarity_score'] = score
+                selected.append(features[i])
+            result[category] = selected
+        return result
+
     try:
-        logger.info(f"🔍 Semantic filtering {len(features)} features for goal: {user_goal[:50]}...")
+        logger.debug("Semantic filtering %d features for goal: %.50s", len(features), user_goal)
         
         # Analyze goal to detect if it's product-focused AND extract key terms
         goal_lower = user_goal.lower()
@@ -128,130 +476,57 @@ async def semantic_filter_features(
                         'jewelry', 'jewellery']
         goal_key_terms = [term for term in product_terms if term in goal_lower]
         
-        logger.info(f"🎯 Goal analysis: product_focused={is_product_focused}, key_terms={goal_key_terms}")
+        logger.debug("Goal analysis: product_focused=%s, key_terms=%s", is_product_focused, goal_key_terms)
         
-        # Build text representations
-        feature_texts = []
-        for f in features:
-            text_parts = [
-                f.get('text', ''),
-                f.get('placeholder', ''),
-                f.get('aria_label', ''),
-                f.get('href', '').split('/')[-1] if f.get('href') else ''
-            ]
-            combined_text = ' '.join([t for t in text_parts if t]).strip()
-            feature_texts.append(combined_text[:500] or 'element')
+        # Text representations (precomputed by the planner when it built the dicts)
+        search_fields = [_search_fields(f) for f in features]
         
         # Batch embed: goal + all features
-        all_texts = [user_goal] + feature_texts
-        all_embeddings = await _batch_embed_texts(all_texts)
-        
-        goal_embedding = np.array(all_embeddings[0])
-        feature_embeddings = [np.array(e) for e in all_embeddings[1:]]
-        
-        # Calculate similarities with smart weighting
-        similarities = []
-        pagination_keywords = ['next', 'previous', 'prev', 'page ', ' page', 'pagination']
-        category_keywords = ['men', 'women', 'woman', 'mens', 'womens', 'shop', 'category', 
-                            'collection', 'apparel', 'clothing', 'accessories', 'jewelry', 
-                            'shoes', 'dress', 'skirt', 'pant', 'shirt', 'top', 'bottom']
-        action_keywords = ['add to cart', 'add to bag', 'buy now', 'purchase', 'checkout', 
-                          'add', 'submit', 'continue', 'proceed', 'confirm', 'place order',
-                          'cart', 'view cart', 'go to cart']
-        menu_keywords = ['menu', 'navigation', 'nav', 'hamburger', 'close', 'open menu']
-        nav_keywords = ['home', 'about', 'contact', 'account', 'login', 'sign in', 'cart', 
-                       'wishlist', 'search', 'help', 'faq', 'support', 'shipping', 'returns']
-        product_keywords = ['product', 'item', '$', 'price', 'shop', 'quick view', 'quick add',
-                           'trouser', 'pant', 'skirt', 'dress', 'shirt', 'shoe', 'jacket',
-                           'earring', 'ring', 'necklace', 'bracelet', 'jewelry', 'jewellery']
+        all_texts = [user_goal] + [search_text for search_text, _ in search_fields]
+        all_embeddings, embedded_all = await _batch_embed_texts(all_texts)
         
-        for i, feature_emb in enumerate(feature_embeddings):
-            similarity = np.dot(goal_embedding, feature_emb) / (
-                np.linalg.norm(goal_embedding) * np.linalg.norm(feature_emb) + 1e-8
-            )
-            
-            # Apply smart weighting based on context
-            feature = features[i]
-            text_lower = (feature.get('text', '') + ' ' + feature.get('aria_label', '') + ' ' + feature.get('href', '')).lower()
-            
-            # VERY STRONG penalty for pagination to stop loops completely
-            is_pagination = any(kw in text_lower for kw in pagination_keywords)
-            if is_pagination and feature.get('type') == 'link':
-                similarity *= 0.01  # Nearly eliminate pagination links from results
-            
-            # Penalty for already clicked elements to avoid loops
-            is_clicked = feature.get('already_clicked', False)
-            if is_clicked:
-                similarity *= 0.3  # Strong penalty for previously clicked elements
-            
-            # Context-aware navigation/menu filtering - APPLY BEFORE EXACT MATCH
-            is_nav = any(kw in text_lower for kw in nav_keywords)
-            is_menu = any(kw in text_lower for kw in menu_keywords)
-            
-            # If this is a product-focused goal, heavily penalize nav/menu items
-            if is_product_focused:
-                if is_nav and feature.get('type') in ['link', 'button']:
-                    similarity *= 0.05  # Very strong penalty for nav (including "home")
-                if is_menu and feature.get('type') in ['button', 'link']:
-                    similarity *= 0.05  # Very strong penalty for menu
-                    
-                # Also penalize very short link text (likely nav)
-                link_text = feature.get('text', '').strip()
-                if feature.get('type') == 'link' and len(link_text) < 4 and not any(kw in text_lower for kw in product_keywords):
-                    similarity *= 0.2  # Short nav text penalty
-            
-            # EXACT WORD MATCH BOOST - Prefer exact matches (comes AFTER nav penalty)
-            # Example: "ring" should match "Rings (16)" NOT "Earrings (62)"
-            import re
-            for key_term in goal_key_terms:
-                # Use word boundaries to match whole words only
-                pattern = r'\b' + re.escape(key_term) + r'\b'
-                if re.search(pattern, text_lower):
-                    similarity *= 5.0  # MASSIVE boost for exact word match
-                    logger.info(f"✨ Exact match boost: '{key_term}' in '{text_lower[:50]}'")
-                    break  # Only boost once per feature
-            else:
-                # Not product-focused, so category navigation is useful
-                is_category = any(kw in text_lower for kw in category_keywords)
-                if is_category and feature.get('type') == 'link' and not is_pagination:
-                    similarity *= 2.0  # Strong boost for category navigation (jewelry, women, etc)
-            
-            # VERY STRONG boost for product links (actual items for sale)
-            is_product = any(kw in text_lower for kw in product_keywords)
-            if is_product and feature.get('type') == 'link' and not is_pagination:
-                similarity *= 4.0  # Massive boost for product links (higher than before)
-            
-            # STRONG boost for action buttons (add to cart, buy now, etc.)
-            is_action = any(kw in text_lower for kw in action_keywords)
-            if is_action and feature.get('type') in ['button', 'link']:
-                similarity *= 2.5  # Very strong boost for action buttons
-            
-            similarities.append((i, float(similarity), features[i]))
+        goal_embedding = np.asarray(all_embeddings[0], dtype=np.float32)
+        feature_embeddings = np.asarray(all_embeddings[1:], dtype=np.float32)
+
+        # Cosine similarity for every feature in one matmul; the vectors are
+        # already unit length, so it's just the (N, d) @ (d,) dot product
+        sims = feature_embeddings @ goal_embedding
+
+        # Smart weighting based on context, one vectorized pass per rule
+        scores = sims * _context_weights(features, search_fields, is_product_focused, goal_key_terms)
         
-        # Group by type and sort each
+        # Group feature indices by type
         by_type = {"input": [], "button": [], "link": []}
-        for idx, score, feature in similarities:
-            ftype = feature.get("type", "link")
-            feature['_similarity_score'] = score
-            by_type[ftype].append((score, feature))
+        for i, feature in enumerate(features):
+            by_type[feature.get("type", "link")].append(i)
         
-        # Sort each category and take top 25
+        # Per category: everything above threshold (max 25), topped up to 12 with lower scorers
         result = {}
+        cache_entry: Dict[str, List[Tuple[int, float]]] = {}
         for ftype in ["input", "button", "link"]:
-            sorted_items = sorted(by_type[ftype], key=lambda x: x[0], reverse=True)
-            # Filter by threshold and take top 25
-            filtered = [item[1] for item in sorted_items if item[0] >= SIMILARITY_THRESHOLD][:25]
-            # If too few, add lower-scoring ones
-            if len(filtered) < 12 and len(sorted_items) > len(filtered):
-                remaining = [item[1] for item in sorted_items[len(filtered):]][:12 - len(filtered)]
-                filtered.extend(remaining)
-            result[ftype + "s"] = filtered  # "inputs", "buttons", "links"
+            indices = np.asarray(by_type[ftype], dtype=np.intp)
+            type_scores = scores[indices]
+            above = int(np.count_nonzero(type_scores >= SIMILARITY_THRESHOLD))
+            k = min(len(indices), max(min(above, 25), 12))
+            picks = [(int(i), float(scores[i])) for i in _top_k(indices, type_scores, k)]
+            selected = []
+            for i, score in picks:
+                features[i]['_similarity_score'] = score
+                selected.append(features[i])
+            result[ftype + "s"] = selected  # "inputs", "buttons", "links"
+            cache_entry[ftype + "s"] = picks
         
         total_sent = sum(len(v) for v in result.values())
-        top_score = max(similarities, key=lambda x: x[1])[1] if similarities else 0
-        logger.info(f"✅ Semantic filter: {len(features)} → {total_sent} features (top score: {top_score:.3f})")
-        logger.info(f"   📊 Breakdown: {len(result['inputs'])} inputs, {len(result['buttons'])} buttons, {len(result['links'])} links")
+        top_score = float(scores.max()) if len(scores) else 0
+        logger.info(
+            "Semantic filter: %d -> %d features (top score: %.3f; %d inputs, %d buttons, %d links)",
+            len(features), total_sent, top_score,
+            len(result['inputs']), len(result['buttons']), len(result['links']),
+        )
         
+        if embedded_all:
+            # A ranking built on neutral vectors is retried next call, not replayed
+            _filter_result_cache[cache_key] = cache_entry
         return result
         
     except Exception as e:
@@ -161,6 +161,18 @@ def transform_shopify_product(
     }
 
 
+def product_embedding_text(product: Dict[str, Any], max_chars: int = 1000) -> str:
+    """Text embedded for a product: title, description and tags, each read once."""
+    description = product.get("description", "")
+    tags = " ".join(product.get("tags", []))
+    parts = [product["title"]]
+    if description:
+        parts.append(description)
+    if tags:
+        parts.append(tags)
+    return " ".join(parts)[:max_chars]
+
+
 async def ingest_shopify_catalog(
     company_id: str,
     store_url: str,
@@ -191,8 +203,7 @@ async def ingest_shopify_catalog(
             product_data = transform_shopify_product(raw_product, store_url)
             
             # Generate embedding for product
-            embed_text_content = f"{product_data['title']} {product_data.get('description', '')} {' '.join(product_data.get('tags', []))}"
-            embedding = embed_text(embed_text_content[:1000])  # Limit embedding text
+            embedding = embed_text(product_embedding_text(product_data))
             
             # Parse ingredients from description
             ingredients = parse_ingredients(product_data.get("description", ""))
@@ -278,8 +289,7 @@ async def sync_product_from_url(
         transformed = transform_shopify_product(product_data, store_url)
         
         # Generate embedding
-        embed_text_content = f"{transformed['title']} {transformed.get('description', '')} {' '.join(transformed.get('tags', []))}"
-        embedding = embed_text(embed_text_content[:1000])
+        embedding = embed_text(product_embedding_text(transformed))
         
         # Create product
         product = graph_service.create_product(
@@ -0,0 +1,103 @@
+"""
+Pure-ASGI CORS middleware for the API's allow-everything policy.
+
+Behaves like Starlette's CORSMiddleware configured with allow_origins=["*"],
+allow_methods=["*"], allow_headers=["*"] and allow_credentials=True, but the
+policy is fixed, so the response headers are prebuilt bytes and requests are
+never re-parsed into Headers objects.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+PREFLIGHT_MAX_AGE = b"600"
+
+_PREFLIGHT_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"vary", b"Origin, Access-Control-Request-Method, Access-Control-Request-Headers"),
+    (b"access-control-allow-methods", ALLOW_METHODS),
+    (b"access-control-max-age", PREFLIGHT_MAX_AGE),
+    (b"access-control-allow-credentials", b"true"),
+    (b"content-type", b"text/plain; charset=utf-8"),
+    (b"content-length", b"2"),
+]
+
+
+_CORS_RESPONSE_HEADERS = frozenset((b"access-control-allow-origin", b"access-control-allow-credentials"))
+
+
+def _with_cors_headers(
+    headers: Iterable[Tuple[bytes, bytes]], cors_headers: List[Tuple[bytes, bytes]]
+) -> List[Tuple[bytes, bytes]]:
+    """
+    Replace any CORS headers the app already set (browsers reject a duplicated
+    Allow-Origin) and fold Origin into a single Vary header.
+    """
+    out: List[Tuple[bytes, bytes]] = []
+    vary: List[bytes] = []
+    for name, value in headers:
+        lname = name.lower()
+        if lname == b"vary":
+            vary.extend(v.strip() for v in value.split(b",") if v.strip())
+        elif lname not in _CORS_RESPONSE_HEADERS:
+            out.append((name, value))
+    if not any(v.lower() in (b"origin", b"*") for v in vary):
+        vary.append(b"Origin")
+    out.append((b"vary", b", ".join(vary)))
+    out.extend(cors_headers)
+    return out
+
+
+class AllowAllCORSMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: Optional[bytes] = None
+        requested_method: Optional[bytes] = None
+        requested_headers: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                requested_method = value
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+
+        if origin is None:
+            # Not a cross-origin request - nothing to add
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and requested_method is not None:
+            await self._preflight(send, origin, requested_headers)
+            return
+
+        # With credentials allowed, the specific origin must be echoed instead of "*"
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+        ]
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = _with_cors_headers(message.get("headers", ()), cors_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    async def _preflight(send: Send, origin: bytes, requested_headers: Optional[bytes]) -> None:
+        """Answer the preflight directly, without running the app."""
+        headers = [(b"access-control-allow-origin", origin), *_PREFLIGHT_HEADERS]
+        if requested_headers is not None:
+            # All headers are allowed, so mirror back whatever was requested
+            headers.append((b"access-control-allow-headers", requested_headers))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
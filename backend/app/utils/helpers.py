@@ -4,6 +4,17 @@ import json
 import re
 from typing import Any, Dict
 
+try:  # pragma: no cover
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+# orjson.loads raises orjson.JSONDecodeError, a ValueError like json's
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", flags=re.IGNORECASE | re.MULTILINE)
+_OBJECT_BLOCK = re.compile(r"\{[\s\S]*\}")
+
 
 class JSONParseError(ValueError):
     pass
@@ -17,23 +28,23 @@ def extract_json_object(text: str) -> Dict[str, Any]:
         raise JSONParseError("Empty response")
 
     # Remove code fences if present
-    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.IGNORECASE | re.MULTILINE)
+    cleaned = _CODE_FENCE.sub("", text.strip())
 
     # First try direct parse
     try:
-        data = json.loads(cleaned)
+        data = _json_loads(cleaned)
         if isinstance(data, dict):
             return data
     except Exception:
         pass
 
     # Fallback: find the first {...} block
-    match = re.search(r"\{[\s\S]*\}", cleaned)
+    match = _OBJECT_BLOCK.search(cleaned)
     if not match:
         raise JSONParseError("No JSON object found in response")
 
     try:
-        data = json.loads(match.group(0))
+        data = _json_loads(match.group(0))
     except Exception as e:
         raise JSONParseError(f"Invalid JSON: {e}") from e
 
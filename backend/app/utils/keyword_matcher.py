@@ -0,0 +1,46 @@
+"""
+Multi-keyword substring matcher.
+
+Classifies a string against several keyword groups in one pass and returns a
+bitmask with bit ``i`` set when any keyword of group ``i`` occurs in the text.
+Uses an Aho-Corasick automaton (pyahocorasick) when installed, otherwise falls
+back to plain substring scans.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+try:  # pragma: no cover
+    import ahocorasick  # type: ignore
+except Exception:  # pragma: no cover
+    ahocorasick = None  # type: ignore[assignment]
+
+
+class KeywordMatcher:
+    def __init__(self, groups: Sequence[Sequence[str]]) -> None:
+        # A keyword may belong to several groups ("cart" is both an action and nav word)
+        masks: Dict[str, int] = {}
+        for gid, keywords in enumerate(groups):
+            for kw in keywords:
+                masks[kw] = masks.get(kw, 0) | (1 << gid)
+        self._masks: List[Tuple[str, int]] = list(masks.items())
+
+        self._automaton = None
+        if ahocorasick is not None and masks:
+            automaton = ahocorasick.Automaton()
+            for kw, mask in masks.items():
+                automaton.add_word(kw, mask)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def match(self, text: str) -> int:
+        """Return the bitmask of groups with at least one keyword in `text`."""
+        flags = 0
+        if self._automaton is not None:
+            for _, mask in self._automaton.iter(text):
+                flags |= mask
+            return flags
+        for kw, mask in self._masks:
+            if kw in text:
+                flags |= mask
+        return flags
@@ -0,0 +1,31 @@
+"""
+Queue-backed root logging so request handlers never block on stderr writes.
+
+Records are put on an in-memory queue by a QueueHandler and written out by a
+QueueListener running in its own thread.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def configure_logging(level: int) -> None:
+    """Like logging.basicConfig(level=...), but emission happens off the event loop."""
+    root = logging.getLogger()
+    if root.handlers:
+        # Already configured (uvicorn --log-config, pytest, a previous call)
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush what's left on shutdown
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
@@ -17,8 +17,11 @@ Usage:
 """
 
 import asyncio
+import json
+import logging
 import sys
 import os
+from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,6 +31,26 @@ from app.services.shopify_catalog import ingest_shopify_catalog
 from app.services.recommendation import recommend_healthy_alternatives
 from app.services.orchestration import plan_buy_action
 
+try:  # pragma: no cover
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:  # pragma: no cover
+    import uvloop  # type: ignore
+except Exception:  # pragma: no cover
+    uvloop = None  # type: ignore[assignment]
+
+DATA_DIR = Path(__file__).parent / "data"
+
+logger = logging.getLogger("demo")
+
+
+def _load_demo_products() -> list:
+    """Demo catalog, read only once Neo4j is known to be reachable."""
+    raw = (DATA_DIR / "demo_products.json").read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 
 async def demo_flow():
     """Run the full demo flow."""
@@ -45,8 +68,7 @@ async def demo_flow():
     
     # Step 1: Setup schema
     print("\n[Step 1] Setting up Neo4j schema...")
-    graph_service.setup_schema()
-    graph_service.setup_vector_index()
+    graph_service.ensure_schema()
     print("✅ Schema setup complete")
     
     # Step 2: Create a demo company
@@ -61,90 +83,16 @@ async def demo_flow():
     # Step 3: Create demo products (simulating Shopify catalog)
     print("\n[Step 3] Creating demo product catalog...")
     
-    # Real PUBLIC Shopify stores with healthy snacks
-    # These are actual Shopify storefronts that sell healthy products
-    demo_products = [
-        {
-            "title": "Classic Potato Chips - Original",
-            "handle": "classic-potato-chips",
-            "vendor": "ChipCo",
-            "price": 4.99,
-            "product_type": "chips",
-            "tags": ["chips", "salty", "snack"],
-            "description": "Classic potato chips. Ingredients: potatoes, vegetable oil, salt. Nutrition: 150 calories, 10g fat, 15g carbs, 1g protein, 0g fiber, 170mg sodium, 1g sugar per serving.",
-            "store_url": "https://lairdsuperfood.com/collections/all",  # Laird Superfood - Shopify
-        },
-        {
-            "title": "Organic Banana Bites",
-            "handle": "organic-banana-bites",
-            "vendor": "Barnana",
-            "price": 5.99,
-            "product_type": "chips",
-            "tags": ["chips", "banana", "healthy", "organic", "high fiber"],
-            "description": "Organic banana snacks. No artificial ingredients. Nutrition: 80 calories, 4g fat, 8g carbs, 3g protein, 2g fiber, 120mg sodium, 0g sugar per serving. Made with whole ingredients.",
-            "store_url": "https://barnana.com/collections/all-snacks",  # Barnana - Shopify
-        },
-        {
-            "title": "Perfect Bar - Peanut Butter",
-            "handle": "perfect-bar-peanut-butter",
-            "vendor": "Perfect Snacks",
-            "price": 4.49,
-            "product_type": "bars",
-            "tags": ["bars", "protein", "peanut butter", "refrigerated"],
-            "description": "Refrigerated protein bar with peanut butter. Nutrition: 330 calories, 17g fat, 27g carbs, 17g protein, 3g fiber, 150mg sodium, 19g sugar per serving.",
-            "store_url": "https://perfectsnacks.com/collections/all",  # Perfect Snacks - Shopify
-        },
-        {
-            "title": "Superfood Creamer",
-            "handle": "superfood-creamer",
-            "vendor": "Laird Superfood",
-            "price": 11.99,
-            "product_type": "superfood",
-            "tags": ["superfood", "creamer", "coconut", "vegan", "keto"],
-            "description": "Plant-based superfood creamer. High in MCTs, vegan, keto-friendly. Nutrition: 45 calories, 4g fat, 1g carbs, 0g protein, 0g fiber, 0mg sodium, 0g sugar per serving. Gluten free and vegan.",
-            "store_url": "https://lairdsuperfood.com/collections/creamers",  # Laird Superfood - Shopify
-        },
-        {
-            "title": "Hu Chocolate Bar",
-            "handle": "hu-chocolate-bar",
-            "vendor": "Hu Kitchen",
-            "price": 6.99,
-            "product_type": "chocolate",
-            "tags": ["chocolate", "vegan", "paleo", "no refined sugar"],
-            "description": "Vegan, paleo-friendly dark chocolate bar. No refined sugar, dairy-free. Nutrition: 200 calories, 15g fat, 18g carbs, 2g protein, 3g fiber, 0mg sodium, 8g sugar per serving.",
-            "store_url": "https://hukitchen.com/collections/chocolate-bars",  # Hu Kitchen - Shopify
-        },
-        {
-            "title": "Coconut Chips - Cacao",
-            "handle": "coconut-chips-cacao",
-            "vendor": "Dang Foods",
-            "price": 5.49,
-            "product_type": "chips",
-            "tags": ["coconut", "chips", "keto", "low sugar", "high fiber", "vegan"],
-            "description": "Crispy coconut chips with cacao. Keto-friendly, low sugar snack. Nutrition: 140 calories, 10g fat, 12g carbs, 2g protein, 4g fiber, 80mg sodium, 4g sugar per serving.",
-            "store_url": "https://dangfoods.com/collections/all",  # Dang Foods - Shopify
-        },
-        {
-            "title": "Protein Cookie - Chocolate Chip",
-            "handle": "protein-cookie-chocolate",
-            "vendor": "Lenny & Larry's",
-            "price": 3.49,
-            "product_type": "cookies",
-            "tags": ["protein", "cookie", "vegan", "high protein"],
-            "description": "Vegan protein cookie with 16g protein. Plant-based, no dairy. Nutrition: 400 calories, 16g fat, 50g carbs, 16g protein, 6g fiber, 400mg sodium, 26g sugar per serving.",
-            "store_url": "https://www.lennylarry.com/collections/all",  # Lenny & Larry's - Shopify
-        },
-    ]
+    # Products link to real PUBLIC Shopify stores with healthy snacks
+    # (store_url in scripts/data/demo_products.json)
+    demo_products = _load_demo_products()
+    
+    from app.services.shopify_catalog import parse_nutrition_from_text, product_embedding_text
+    from app.services.doc_ingestion import embed_text
     
     created_products = []
     for p in demo_products:
-        # Create product with nutrition parsing
-        from app.services.shopify_catalog import parse_nutrition_from_text
-        from app.services.doc_ingestion import embed_text
-        
-        # Generate embedding
-        embed_text_content = f"{p['title']} {p.get('description', '')} {' '.join(p.get('tags', []))}"
-        embedding = embed_text(embed_text_content[:1000])
+        embedding = embed_text(product_embedding_text(p))
         
         product = graph_service.create_product(
             company_id=company_id,
@@ -174,7 +122,7 @@ async def demo_flow():
                     basis=claim["basis"]
                 )
             
-            print(f"   ✅ Created: {p['title']} - ${p['price']} ({len(nutrition_claims)} nutrition claims)")
+            logger.info(f"   ✅ Created: {p['title']} - ${p['price']} ({len(nutrition_claims)} nutrition claims)")
     
     print(f"✅ Created {len(created_products)} products")
     
@@ -367,4 +315,8 @@ Neo4j Cypher to explore:
 
 
 if __name__ == "__main__":
-    asyncio.run(demo_flow())
+    # Same stream as print() so progress lines stay in order; app modules stay at WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.INFO)
+    # libuv event loop when available (uvloop.run needs uvloop >= 0.18; older installs use asyncio)
+    (getattr(uvloop, "run", None) or asyncio.run)(demo_flow())
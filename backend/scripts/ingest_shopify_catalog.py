@@ -21,6 +21,11 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+try:  # pragma: no cover
+    import uvloop  # type: ignore
+except Exception:  # pragma: no cover
+    uvloop = None  # type: ignore[assignment]
+
 
 async def main():
     parser = argparse.ArgumentParser(description="Ingest Shopify catalog into Neo4j")
@@ -46,8 +51,7 @@ async def main():
     
     # Setup schema
     print("Setting up schema...")
-    graph_service.setup_schema()
-    graph_service.setup_vector_index()
+    graph_service.ensure_schema()
     
     # Get or create company
     company_id = args.company_id
@@ -97,4 +101,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # libuv event loop when available (uvloop.run needs uvloop >= 0.18; older installs use asyncio)
+    (getattr(uvloop, "run", None) or asyncio.run)(main())
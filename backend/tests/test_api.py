@@ -124,3 +124,56 @@ async def test_session_flow_start_next_correct_status(fake_db, monkeypatch):
         assert st_body["session_id"] == session_id
         assert st_body["status"] == "in_progress"
 
+
+
+@pytest.mark.anyio
+async def test_cors_preflight_and_simple_response_headers():
+    app = create_app(with_db=False)
+    transport = httpx.ASGITransport(app=app)
+    origin = "chrome-extension://abcdef"
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        preflight = await client.options(
+            "/api/session/start",
+            headers={
+                "Origin": origin,
+                "Access-Control-Request-Method": "POST",
+                "Access-Control-Request-Headers": "content-type",
+            },
+        )
+        assert preflight.status_code == 200
+        assert preflight.headers["access-control-allow-origin"] == origin
+        assert preflight.headers["access-control-allow-headers"] == "content-type"
+        assert "POST" in preflight.headers["access-control-allow-methods"]
+        assert preflight.headers["access-control-allow-credentials"] == "true"
+
+        simple = await client.get("/health", headers={"Origin": origin})
+        assert simple.status_code == 200
+        assert simple.headers["access-control-allow-origin"] == origin
+        assert simple.headers["access-control-allow-credentials"] == "true"
+        assert "Origin" in simple.headers["vary"]
+
+        no_origin = await client.get("/health")
+        assert "access-control-allow-origin" not in no_origin.headers
+
+
+@pytest.mark.anyio
+async def test_cors_replaces_app_set_headers_and_merges_vary():
+    from starlette.responses import PlainTextResponse
+
+    from app.utils.cors import AllowAllCORSMiddleware
+
+    async def app(scope, receive, send):
+        response = PlainTextResponse(
+            "ok",
+            headers={"Access-Control-Allow-Origin": "*", "Vary": "Accept-Encoding"},
+        )
+        await response(scope, receive, send)
+
+    transport = httpx.ASGITransport(app=AllowAllCORSMiddleware(app))
+    origin = "chrome-extension://abcdef"
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/", headers={"Origin": origin})
+
+    assert response.headers.get_list("access-control-allow-origin") == [origin]
+    assert response.headers.get_list("vary") == ["Accept-Encoding, Origin"]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import app.services.doc_ingestion as doc_ingestion
+
+DOC_TEXT = """How to create a chart
+
+1. Click the "New" button
+2. Select "Chart" from the menu
+3. Enter "Revenue" as the name
+"""
+
+
+class _FakeGraph:
+    def __init__(self):
+        self.calls = []
+        self._ids = 0
+
+    def _record(self, name, **kwargs):
+        self._ids += 1
+        self.calls.append((name, kwargs))
+        return {"id": f"{name}-{self._ids}"}
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._record(name, **kwargs)
+
+
+@pytest.fixture()
+def fake_graph(monkeypatch):
+    graph = _FakeGraph()
+    monkeypatch.setattr(doc_ingestion, "graph_service", graph)
+    return graph
+
+
+@pytest.mark.anyio
+async def test_file_ingestion_pairs_each_chunk_and_goal_with_its_embedding(monkeypatch, fake_graph):
+    batches = []
+
+    def _embed_texts(texts, use_disk_cache=False):
+        assert use_disk_cache  # Ingestion is what the disk cache is for
+        batches.append(list(texts))
+        return [[text] for text in texts]  # "Vector" that names its source text
+
+    monkeypatch.setattr(doc_ingestion, "embed_texts", _embed_texts)
+
+    result = await doc_ingestion.ingest_docs_from_file("acme", "guide.md", DOC_TEXT.encode(), "text/markdown")
+
+    assert result["procedures_extracted"] == 1
+    chunks = [c for name, kw in fake_graph.calls if name == "create_chunks_bulk" for c in kw["chunks"]]
+    procedure = next(kw for name, kw in fake_graph.calls if name == "create_procedure")
+    assert len(chunks) == result["chunks_created"] > 1
+    assert [name for name, _ in fake_graph.calls].count("create_chunks_bulk") == 1  # One query for the page
+    assert all(c["embedding"] == [c["text"]] for c in chunks)
+    assert procedure["goal_embedding"] == [procedure["goal"]]
+    assert sum(len(b) for b in batches) == len(chunks) + 1
+    assert all(len(b) <= doc_ingestion.EMBED_BATCH_SIZE for b in batches)
+
+    steps = next(kw for name, kw in fake_graph.calls if name == "create_steps_bulk")
+    assert [step["idx"] for step in steps["steps"]] == [1, 2, 3]
+
+
+@pytest.mark.anyio
+async def test_pipeline_batches_embeddings_across_pages(monkeypatch, fake_graph):
+    batches = []
+
+    def _embed_texts(texts, use_disk_cache=False):
+        assert use_disk_cache  # Ingestion is what the disk cache is for
+        batches.append(len(texts))
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr(doc_ingestion, "embed_texts", _embed_texts)
+    monkeypatch.setattr(doc_ingestion, "EMBED_BATCH_SIZE", 4)
+
+    async def pages():
+        for i in range(5):
+            yield f"page-{i}", f"Short page number {i} about charts.", ""
+
+    chunks, procedures = await doc_ingestion._run_pipeline(pages(), asyncio.Semaphore(2))
+
+    assert (chunks, procedures) == (5, 0)
+    assert sum(batches) == 5 and max(batches) <= 4
+    # One bulk chunk write per page (each page here is a single chunk)
+    assert sorted(kw["page_id"] for name, kw in fake_graph.calls if name == "create_chunks_bulk") == [
+        f"page-{i}" for i in range(5)
+    ]
+
+
+@pytest.mark.anyio
+async def test_crawl_fetches_concurrently_and_keeps_bfs_order(monkeypatch):
+    import httpx
+
+    body = "<p>" + "documentation text " * 10 + "</p>"
+    site = {
+        "/": '<title>Root</title><a href="/a">a</a><a href="/b#x">b</a><a href="/blog/post">blog</a>' + body,
+        "/a": '<title>A</title><a href="/c">c</a><a href="/">root</a>' + body,
+        "/b": '<title>B</title><p>too short</p><a href="/d">d</a>',
+        "/c": "<title>C</title>" + body,
+        "/d": "<title>D</title>" + body,
+    }
+    in_flight = peak = 0
+    requested = []
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        requested.append(request.url.path)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        html = site.get(request.url.path)
+        if html is None:
+            return httpx.Response(404)
+        return httpx.Response(200, text=f"<html><body>{html}</body></html>", headers={"Content-Type": "text/html"})
+
+    monkeypatch.setattr(
+        doc_ingestion, "_crawl_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+    pages = await doc_ingestion.crawl_docs("https://docs.test/", max_pages=10)
+
+    assert [p["title"] for p in pages] == ["Root", "A", "C"]  # /b too short, /blog skipped
+    assert sorted(requested) == ["/", "/a", "/b", "/c"]  # Each URL fetched once; /b's link to /d not followed
+    assert peak == 2  # /a and /b fetched together
+
+    requested.clear()
+    assert [p["title"] for p in await doc_ingestion.crawl_docs("https://docs.test/", max_pages=1)] == ["Root"]
+    assert requested == ["/"]
+
+
+def test_parse_step_canonicalizes_and_interns_selector_hints():
+    first = doc_ingestion._parse_step('Click the "Add  Event" button', 1)
+    second = doc_ingestion._parse_step("Then click 'Add Event'", 2)
+    assert first["selector_hint"] == "Add Event"
+    assert first["selector_hint"] is second["selector_hint"]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import app.services.doc_ingestion as doc_ingestion
+from app.services.embedding_cache import EmbeddingDiskCache
+
+
+def test_disk_cache_round_trips_vectors(tmp_path):
+    cache = EmbeddingDiskCache(str(tmp_path / "emb.sqlite3"))
+    cache.put_many("voyage-2", {"hello": [0.5, -0.25, 1.0]})
+
+    assert cache.get_many("voyage-2", ["hello", "missing"]) == {"hello": [0.5, -0.25, 1.0]}
+    assert cache.get_many("other-model", ["hello"]) == {}  # Keyed by model too
+    cache.close()
+
+
+def test_embed_texts_only_sends_uncached_text(tmp_path, monkeypatch):
+    sent = []
+
+    class _Result:
+        def __init__(self, texts):
+            self.embeddings = [[float(len(t)), 1.0] for t in texts]
+
+    class _Client:
+        def embed(self, texts, model):
+            sent.append(list(texts))
+            return _Result(texts)
+
+    cache = EmbeddingDiskCache(str(tmp_path / "emb.sqlite3"))
+    cache.put_many(doc_ingestion.EMBED_MODEL, {"seen": [9.0, 9.0]})
+    monkeypatch.setattr(doc_ingestion, "get_disk_cache", lambda: cache)
+    monkeypatch.setattr(doc_ingestion, "get_voyage_client", lambda: _Client())
+
+    result = doc_ingestion.embed_texts(["seen", "new", "new"], use_disk_cache=True)
+
+    assert sent == [["new"]]
+    assert result == [[9.0, 9.0], [3.0, 1.0], [3.0, 1.0]]
+    assert cache.get_many(doc_ingestion.EMBED_MODEL, ["new"]) == {"new": [3.0, 1.0]}
+
+    assert doc_ingestion.embed_texts(["new"], use_disk_cache=True) == [[3.0, 1.0]]
+    assert len(sent) == 1  # Second run served entirely from disk
+
+    # Request-path callers (embed_text for user goals) never read or write the disk cache
+    assert doc_ingestion.embed_text("user goal") == [9.0, 1.0]
+    assert doc_ingestion.embed_texts(["seen"]) == [[4.0, 1.0]]
+    assert cache.get_many(doc_ingestion.EMBED_MODEL, ["user goal"]) == {}
+    cache.close()
+
+
+def test_disk_cache_path_resolves_under_backend_dir(monkeypatch, tmp_path):
+    import os
+
+    import app.services.embedding_cache as embedding_cache
+
+    opened = []
+    monkeypatch.setattr(embedding_cache, "EmbeddingDiskCache", opened.append)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(embedding_cache.settings, "embedding_disk_cache_path", ".cache/emb.sqlite3")
+    embedding_cache.get_disk_cache.cache_clear()
+    try:
+        embedding_cache.get_disk_cache()
+    finally:
+        embedding_cache.get_disk_cache.cache_clear()
+    assert opened == [os.path.join(embedding_cache._BACKEND_DIR, ".cache", "emb.sqlite3")]
+    assert os.path.isfile(os.path.join(embedding_cache._BACKEND_DIR, "app", "config.py"))
+
+
+def test_embed_texts_survives_disk_cache_errors(monkeypatch):
+    import sqlite3
+
+    class _BrokenCache:
+        def get_many(self, model, texts):
+            raise sqlite3.OperationalError("database is locked")
+
+        def put_many(self, model, embeddings):
+            raise sqlite3.OperationalError("database is locked")
+
+    class _Client:
+        def embed(self, texts, model):
+            return type("R", (), {"embeddings": [[1.0, float(len(t))] for t in texts]})()
+
+    monkeypatch.setattr(doc_ingestion, "get_disk_cache", lambda: _BrokenCache())
+    monkeypatch.setattr(doc_ingestion, "get_voyage_client", lambda: _Client())
+
+    assert doc_ingestion.embed_texts(["ab", "abc"], use_disk_cache=True) == [[1.0, 2.0], [1.0, 3.0]]
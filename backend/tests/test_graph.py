@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from app.services.graph import SCHEMA_VERSION, GraphService
+
+
+def _patch_schema(monkeypatch, version, vector_ok=True):
+    calls = []
+    monkeypatch.setattr(GraphService, "current_schema_version", classmethod(lambda cls: version))
+    monkeypatch.setattr(GraphService, "setup_schema", classmethod(lambda cls: calls.append("schema")))
+    monkeypatch.setattr(GraphService, "setup_vector_index", classmethod(lambda cls: calls.append("vector") or vector_ok))
+    monkeypatch.setattr(GraphService, "set_schema_version", classmethod(lambda cls, v: calls.append(("version", v))))
+    return calls
+
+
+def test_ensure_schema_skips_when_version_applied(monkeypatch):
+    calls = _patch_schema(monkeypatch, SCHEMA_VERSION)
+    assert GraphService.ensure_schema() is False
+    assert calls == []
+
+    assert GraphService.ensure_schema(force=True) is True
+    assert calls == ["schema", "vector", ("version", SCHEMA_VERSION)]
+
+
+def test_ensure_schema_leaves_version_unset_when_vector_index_fails(monkeypatch):
+    calls = _patch_schema(monkeypatch, 0, vector_ok=False)
+    assert GraphService.ensure_schema() is True
+    assert calls == ["schema", "vector"]  # Retried on the next run
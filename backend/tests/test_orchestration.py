@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app.services.orchestration import get_purchase_step_by_name, match_purchase_step_to_ui
+
+
+def test_purchase_step_prefers_earlier_hint_over_earlier_element():
+    step = get_purchase_step_by_name("add_to_cart")
+    ui_context = {
+        "elements": [
+            {"selector": ".btn-primary", "text": "Add to Cart", "type": "button"},  # Only the :contains literal
+            {"selector": "button[name='add']", "text": "Add", "type": "button"},
+            {"selector": "#AddToCart-main", "text": "Buy", "type": "button"},
+        ]
+    }
+    action = match_purchase_step_to_ui(step, ui_context)
+    assert action["selector"] == "#AddToCart-main"
+
+    ui_context["elements"].pop()
+    assert match_purchase_step_to_ui(step, ui_context)["selector"] == "button[name='add']"
+
+    ui_context["elements"].pop()
+    assert match_purchase_step_to_ui(step, ui_context)["selector"] == ".btn-primary"
+
+    miss = match_purchase_step_to_ui(step, {"elements": [{"selector": "#x", "text": "Help"}]})
+    assert miss["selector"] is None and "warning" in miss
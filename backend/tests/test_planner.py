@@ -3,7 +3,12 @@ from __future__ import annotations
 import pytest
 
 from app.models import PageFeature
-from app.services.planner import build_planner_prompt, parse_planner_steps, PlannerError
+from app.services.planner import (
+    PlannerError,
+    StreamingStepParser,
+    build_planner_prompt,
+    parse_planner_steps,
+)
 
 
 def test_build_planner_prompt_includes_goal_url_and_features():
@@ -16,8 +21,8 @@ def test_build_planner_prompt_includes_goal_url_and_features():
     )
     assert "buy wireless mouse under $30" in prompt
     assert "https://amazon.com" in prompt
-    assert '"index": 0' in prompt
-    assert '"selector": "#search"' in prompt
+    assert '"index":0' in prompt
+    assert '"selector":"#search"' in prompt
 
 
 def test_parse_planner_steps_valid_json():
@@ -44,3 +49,75 @@ def test_parse_planner_steps_rejects_non_json():
     with pytest.raises(PlannerError):
         parse_planner_steps("hello not json")
 
+
+
+def test_parse_planner_steps_fenced_output_sorted_by_step_number():
+    raw = """Here is the plan:
+```json
+{"steps": [
+  {"step_number": 2, "action": "DONE", "description": "Done"},
+  {"step_number": 1, "action": "CLICK", "description": "Click search", "target_hints": {"type": "input"}}
+]}
+```"""
+    steps = parse_planner_steps(raw)
+    assert [s.step_number for s in steps] == [1, 2]
+
+
+def test_parse_planner_steps_reports_invalid_step_index():
+    raw = '{"steps": [{"step_number": 1, "action": "DONE", "description": "ok"}, {"step_number": 2, "action": "JUMP", "description": "bad"}]}'
+    with pytest.raises(PlannerError, match="index 1"):
+        parse_planner_steps(raw)
+
+
+def test_streaming_step_parser_yields_steps_as_they_close():
+    raw = """```json
+{"steps": [
+  {"step_number": 2, "action": "DONE", "description": "Done, see {braces} ]"},
+  {"step_number": 1, "action": "CLICK", "description": "Click search", "target_hints": {"type": "input"}}
+]}
+```"""
+    parser = StreamingStepParser()
+    seen = []
+    for i in range(0, len(raw), 7):
+        parser.feed(raw[i:i + 7])
+        seen.append(len(parser.steps))
+
+    assert parser.complete and parser.text == raw
+    assert [s.step_number for s in parser.steps] == [2, 1]
+    assert seen[0] == 0 and 1 in seen  # First step was available before the stream ended
+
+
+def test_streaming_step_parser_leaves_invalid_output_to_buffered_parse():
+    parser = StreamingStepParser()
+    parser.feed('{"steps": [{"step_number": 1, "action": "JUMP", "description": "bad"}]}')
+    assert not parser.complete
+
+    parser = StreamingStepParser()
+    parser.feed("no plan here")
+    assert not parser.complete
+
+
+@pytest.mark.anyio
+async def test_planner_parse_errors_are_not_retried_as_rate_limits(monkeypatch):
+    import app.services.planner as planner
+    from app.config import settings
+
+    calls = []
+
+    async def _call_openai(prompt):
+        calls.append(prompt)
+        parser = StreamingStepParser()
+        parser.feed("Sorry, I hit a rate limit (429) and cannot plan this.")
+        return parser
+
+    async def _passthrough(user_goal, features, url=""):
+        return {"inputs": features, "buttons": [], "links": []}
+
+    monkeypatch.setattr(planner, "USE_BACKBOARD", False)
+    monkeypatch.setattr(planner, "semantic_filter_features", _passthrough)
+    monkeypatch.setattr(planner, "_call_openai", _call_openai)
+    monkeypatch.setattr(settings, "llm_min_delay", 0)
+
+    with pytest.raises(PlannerError, match="non-JSON"):
+        await planner.generate_workflow_plan("buy a mouse", [], "https://shop.test")
+    assert len(calls) == 1
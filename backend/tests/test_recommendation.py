@@ -368,8 +368,8 @@ def test_confirmation_required_at_review():
     review_step = get_purchase_step_by_name("review_order")
     
     assert review_step is not None
-    assert review_step["requires_confirmation"] == True
-    assert "STOP" in review_step["instruction"] or "confirm" in review_step["instruction"].lower()
+    assert review_step.requires_confirmation == True
+    assert "STOP" in review_step.instruction or "confirm" in review_step.instruction.lower()
 
 
 def test_no_auto_purchase_step():
@@ -378,9 +378,9 @@ def test_no_auto_purchase_step():
     
     # Verify no step automatically completes purchase
     for step in PURCHASE_STEPS:
-        if step["name"] in ["complete_purchase", "submit_order", "place_order"]:
+        if step.name in ["complete_purchase", "submit_order", "place_order"]:
             # If such a step exists, it must require confirmation
-            assert step.get("requires_confirmation", False) == True
+            assert step.requires_confirmation == True
 
 
 # ============================================================================
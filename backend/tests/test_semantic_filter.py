@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import app.services.semantic_filter as semantic_filter
+
+
+def _fake_embedder(vectors):
+    import numpy as np
+
+    async def _batch_embed_texts(texts):
+        # Same contract as the real one: unit-length vectors
+        out = []
+        for t in texts:
+            vec = np.asarray(vectors.get(t, [0.0, 0.0, 1.0]), dtype=np.float32)
+            out.append(vec / np.linalg.norm(vec))
+        return out, True
+
+    return _batch_embed_texts
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_ranks_by_cosine_similarity(monkeypatch):
+    vectors = {
+        "open settings": [1.0, 0.0, 0.0],
+        "Settings": [2.0, 0.1, 0.0],
+        "Profile": [0.5, 0.5, 0.0],
+        "Logout": [0.0, 1.0, 0.0],
+    }
+    monkeypatch.setattr(semantic_filter, "_batch_embed_texts", _fake_embedder(vectors))
+    monkeypatch.setattr(semantic_filter, "PASSTHROUGH_MAX_FEATURES", 0)
+
+    features = [
+        {"index": 0, "type": "button", "text": "Logout", "selector": "#logout"},
+        {"index": 1, "type": "button", "text": "Profile", "selector": "#profile"},
+        {"index": 2, "type": "button", "text": "Settings", "selector": "#settings"},
+    ]
+    result = await semantic_filter.semantic_filter_features("open settings", features)
+
+    assert [f["index"] for f in result["buttons"]] == [2, 1, 0]
+    assert result["buttons"][0]["_similarity_score"] == pytest.approx(0.9988, abs=1e-3)
+    assert result["inputs"] == [] and result["links"] == []
+
+
+def test_keyword_matcher_sets_every_group_bit():
+    from app.utils.keyword_matcher import KeywordMatcher
+
+    matcher = KeywordMatcher([["next", "page "], ["cart"], ["cart", "home"]])
+    assert matcher.match("go to cart") == 0b110
+    assert matcher.match("next page 2") == 0b001
+    assert matcher.match("nothing here") == 0
+
+    matcher._automaton = None  # substring-scan fallback gives the same answer
+    assert matcher.match("go to cart") == 0b110
+
+
+def test_lru_cache_evicts_least_recently_used():
+    from app.utils.lru import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache["c"] = 3
+    assert "b" not in cache
+    assert len(cache) == 2 and cache.get("a") == 1 and cache.get("c") == 3
+
+
+@pytest.mark.anyio
+async def test_batch_embed_texts_reads_shared_cache_before_voyage(monkeypatch):
+    class _Cursor:
+        def __init__(self, docs):
+            self.docs = docs
+
+        async def to_list(self, length=None):
+            return self.docs
+
+    class _Collection:
+        def __init__(self, docs):
+            self.docs = {d["_id"]: d for d in docs}
+
+        def find(self, query, projection=None):
+            return _Cursor([self.docs[k] for k in query["_id"]["$in"] if k in self.docs])
+
+        async def update_many(self, query, update):
+            touched.extend(query["_id"]["$in"])
+            for k in query["_id"]["$in"]:
+                self.docs[k].update(update["$set"])
+
+    from datetime import datetime
+
+    touched = []
+    stored = {"Settings": [1.0, 0.0], "Profile": [0.0, 1.0]}
+    docs = []
+    for text, embedding in stored.items():
+        scale, data = semantic_filter._quantize(embedding)
+        docs.append({"_id": semantic_filter._mongo_key(text), "scale": scale, "q": data})
+    docs[1]["updated_at"] = datetime.utcnow()  # Touched recently (naive UTC, as PyMongo returns it)
+    collection = _Collection(docs)
+    monkeypatch.setattr(semantic_filter, "_embedding_collection", lambda: collection)
+    monkeypatch.setattr(semantic_filter, "_embedding_cache", semantic_filter.LRUCache(maxsize=10))
+
+    result, complete = await semantic_filter._batch_embed_texts(["Settings", "Profile"])
+    assert complete
+
+    assert [r.tolist() for r in result] == [[1.0, 0.0], [0.0, 1.0]]
+    assert semantic_filter._embedding_cache.get("Settings") == semantic_filter._quantize([1.0, 0.0])
+    await asyncio.gather(*semantic_filter._background_tasks)
+    # Hits refresh the TTL clock in the background, skipping recently touched entries
+    assert touched == [semantic_filter._mongo_key("Settings")]
+
+
+def test_quantized_embeddings_round_trip():
+    import numpy as np
+
+    vec = np.random.default_rng(0).normal(size=1024).astype(np.float32)
+    scale, data = semantic_filter._quantize(vec)
+    assert len(data) == 1024  # One byte per dimension
+    restored = semantic_filter._dequantize((scale, data))
+    cosine = restored @ vec / (np.linalg.norm(restored) * np.linalg.norm(vec))
+    assert cosine > 0.999
+    assert abs(np.linalg.norm(restored) - 1.0) < 1e-2  # Stored unit length
+
+    zero = semantic_filter._dequantize(semantic_filter._quantize(np.zeros(4)))
+    assert zero.tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_reuses_result_for_unchanged_page(monkeypatch):
+    calls = []
+
+    async def _batch_embed_texts(texts):
+        calls.append(texts)
+        return [[1.0, 0.0]] * len(texts), True
+
+    monkeypatch.setattr(semantic_filter, "_batch_embed_texts", _batch_embed_texts)
+    monkeypatch.setattr(semantic_filter, "_filter_result_cache", semantic_filter.LRUCache(maxsize=4))
+    monkeypatch.setattr(semantic_filter, "PASSTHROUGH_MAX_FEATURES", 0)
+
+    features = [{"index": 0, "type": "button", "text": "Search", "selector": "#go"}]
+    first = await semantic_filter.semantic_filter_features("search shoes", features, url="https://a.com")
+    second = await semantic_filter.semantic_filter_features("search shoes", features, url="https://a.com")
+    assert first == second and len(calls) == 1
+
+    # Fields outside the key come from the current request's dicts, not the cached ones
+    typed = [{**features[0], "value": "boots"}]
+    third = await semantic_filter.semantic_filter_features("search shoes", typed, url="https://a.com")
+    assert third["buttons"][0]["value"] == "boots" and len(calls) == 1
+    assert third["buttons"][0]["_similarity_score"] == first["buttons"][0]["_similarity_score"]
+
+    features[0]["already_clicked"] = True  # Changes the ranking inputs -> recompute
+    await semantic_filter.semantic_filter_features("search shoes", features, url="https://a.com")
+    assert len(calls) == 2
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_skips_embedding_for_small_pages(monkeypatch):
+    async def _batch_embed_texts(texts):
+        raise AssertionError("small pages must not be embedded")
+
+    monkeypatch.setattr(semantic_filter, "_batch_embed_texts", _batch_embed_texts)
+
+    features = [
+        {"index": 0, "type": "input", "text": "", "selector": "#q"},
+        {"index": 1, "type": "link", "text": "Home", "selector": "a"},
+    ]
+    result = await semantic_filter.semantic_filter_features("search shoes", features)
+    assert result == {"inputs": [features[0]], "buttons": [], "links": [features[1]]}
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_caps_and_tops_up_each_category(monkeypatch):
+    import math
+
+    # Button i sits at angle i degrees from the goal, so lower index ranks higher
+    vectors = {"goal": [1.0, 0.0]}
+    features = []
+    for i in range(90):
+        text = f"b{i}"
+        vectors[text] = [math.cos(math.radians(i)), math.sin(math.radians(i))]
+        features.append({"index": i, "type": "button", "text": text, "selector": f"#{text}"})
+    features.append({"index": 90, "type": "link", "text": "far", "selector": "a"})
+    vectors["far"] = [-1.0, 0.0]
+    monkeypatch.setattr(semantic_filter, "_batch_embed_texts", _fake_embedder(vectors))
+    monkeypatch.setattr(semantic_filter, "PASSTHROUGH_MAX_FEATURES", 0)
+
+    result = await semantic_filter.semantic_filter_features("goal", features[::-1])
+
+    assert [f["index"] for f in result["buttons"]] == list(range(25))
+    assert [f["index"] for f in result["links"]] == [90]  # Below threshold, kept to reach the minimum
+    assert "_similarity_score" not in features[50]
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_uses_precomputed_search_fields(monkeypatch):
+    seen = []
+
+    async def _batch_embed_texts(texts):
+        seen.extend(texts)
+        return [[1.0, 0.0]] * len(texts), True
+
+    monkeypatch.setattr(semantic_filter, "_batch_embed_texts", _batch_embed_texts)
+    monkeypatch.setattr(semantic_filter, "PASSTHROUGH_MAX_FEATURES", 0)
+
+    search_text, text_lower = semantic_filter.feature_search_fields("Go", "", "Search", "/s/find")
+    assert (search_text, text_lower) == ("Go Search find", "go search /s/find")
+
+    features = [
+        {"index": 0, "type": "button", "text": "Go", "aria_label": "Search", "href": "/s/find"},
+        {"index": 1, "type": "button", "text": "ignored", "_search_text": "precomputed", "_text_lower": "precomputed"},
+    ]
+    await semantic_filter.semantic_filter_features("search", features)
+    assert seen == ["search", "Go Search find", "precomputed"]
+
+
+@pytest.mark.anyio
+async def test_semantic_filter_does_not_cache_ranking_after_embedding_failure(monkeypatch):
+    import app.services.embeddings as embeddings
+
+    calls = []
+
+    async def _voyage_embed(texts):
+        calls.append(texts)
+        raise RuntimeError("voyage down")
+
+    async def _embed_text(text):
+        raise RuntimeError("voyage down")
+
+    monkeypatch.setattr(semantic_filter, "_voyage_embed", _voyage_embed)
+    monkeypatch.setattr(embeddings, "embed_text", _embed_text)
+    monkeypatch.setattr(semantic_filter, "_embedding_collection", lambda: None)
+    monkeypatch.setattr(semantic_filter, "_embedding_cache", semantic_filter.LRUCache(maxsize=10))
+    monkeypatch.setattr(semantic_filter, "_filter_result_cache", semantic_filter.LRUCache(maxsize=4))
+    monkeypatch.setattr(semantic_filter, "PASSTHROUGH_MAX_FEATURES", 0)
+
+    features = [{"index": 0, "type": "button", "text": "Search", "selector": "#go"}]
+    await semantic_filter.semantic_filter_features("search shoes", features, url="https://a.com")
+    await semantic_filter.semantic_filter_features("search shoes", features, url="https://a.com")
+    assert len(calls) == 2  # Second call embeds again instead of replaying the neutral ranking
+
+
+def test_top_k_keeps_page_order_among_ties_at_the_cutoff():
+    import numpy as np
+
+    scores = np.array([0.5] * 40 + [0.9], dtype=np.float32)
+    indices = np.arange(len(scores), dtype=np.intp)
+    assert semantic_filter._top_k(indices, scores, 12).tolist() == [40] + list(range(11))